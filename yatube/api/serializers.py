@@ -0,0 +1,146 @@
+"""Сериализация ответов API прямо из `.values()`.
+
+Модели не создаются: запрос выбирает только колонки запрошенных полей
+(`?fields=`), а связанные автор и группа (`?expand=`) подтягиваются в
+тот же запрос через JOIN и собираются во вложенные словари.
+"""
+from django.conf import settings
+
+
+class FieldError(ValueError):
+    """В `?fields=` или `?expand=` есть неизвестное имя."""
+
+
+def _media_url(name):
+    return f'{settings.MEDIA_URL}{name}' if name else None
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+class Resource:
+    """Описание ресурса: поля ответа и колонки, из которых они берутся.
+
+    `fields` — словарь `имя поля -> колонка`, `expansions` — словарь
+    `имя поля -> {вложенное имя -> колонка}` для полей, которые по
+    `?expand=` заменяются объектом, `converters` — функции, которыми
+    прогоняется значение колонки.
+    """
+
+    def __init__(self, fields, expansions=None, converters=None):
+        self.fields = fields
+        self.expansions = expansions or {}
+        self.converters = converters or {}
+
+    def _names(self, requested, known, label):
+        if not requested:
+            return None
+        names = [name for name in requested.split(',') if name]
+        unknown = set(names) - set(known)
+        if unknown:
+            raise FieldError(
+                f'Неизвестные {label}: {", ".join(sorted(unknown))}'
+            )
+        return names
+
+    def plan(self, fields=None, expand=None):
+        """Поля ответа с колонками; раскрытые поля — словари колонок."""
+        names = self._names(fields, self.fields, 'поля') or list(self.fields)
+        expanded = set(self._names(expand, self.expansions, 'связи') or ())
+        return [
+            (name, self.expansions[name] if name in expanded
+             else self.fields[name])
+            for name in names
+        ]
+
+    def columns(self, plan, required=()):
+        columns = list(required)
+        for _, source in plan:
+            sources = source.values() if isinstance(source, dict) else [
+                source
+            ]
+            columns.extend(
+                column for column in sources if column not in columns
+            )
+        return columns
+
+    def _value(self, row, name, column):
+        convert = self.converters.get(name)
+        value = row[column]
+        return convert(value) if convert else value
+
+    def dump(self, row, plan):
+        item = {}
+        for name, source in plan:
+            if not isinstance(source, dict):
+                item[name] = self._value(row, name, source)
+            elif row[source['id']] is None:
+                item[name] = None
+            else:
+                item[name] = {
+                    key: self._value(row, key, column)
+                    for key, column in source.items()
+                }
+        return item
+
+
+AUTHOR = {
+    'id': 'author_id',
+    'username': 'author__username',
+    'first_name': 'author__first_name',
+    'last_name': 'author__last_name',
+}
+
+POSTS = Resource(
+    fields={
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'author': 'author_id',
+        'group': 'group_id',
+        'image': 'image',
+        'thumbnail': 'thumbnail',
+    },
+    expansions={
+        'author': AUTHOR,
+        'group': {
+            'id': 'group_id',
+            'slug': 'group__slug',
+            'title': 'group__title',
+        },
+    },
+    converters={
+        'pub_date': _isoformat,
+        'image': _media_url,
+        'thumbnail': _media_url,
+    },
+)
+
+GROUPS = Resource(fields={
+    'id': 'id',
+    'title': 'title',
+    'slug': 'slug',
+    'description': 'description',
+    'posts_count': 'posts_count',
+})
+
+COMMENTS = Resource(
+    fields={
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author_id',
+        'text': 'text',
+        'created': 'created',
+    },
+    expansions={'author': AUTHOR},
+    converters={'created': _isoformat},
+)
+
+FOLLOWS = Resource(
+    fields={
+        'id': 'id',
+        'author': 'author_id',
+    },
+    expansions={'author': AUTHOR},
+)
@@ -0,0 +1,159 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from posts.paginator import encode_cursor
+from ..views import PAGE_SIZE
+
+User = get_user_model()
+
+
+class ApiReadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='api_author', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='api-group', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {n}', author=cls.user, group=cls.group)
+            for n in range(PAGE_SIZE + 3)
+        )
+        cls.post = Post.objects.create(text='Последний', author=cls.user)
+        Comment.objects.create(post=cls.post, author=cls.user, text='К')
+
+    def test_posts_are_paginated_by_cursor(self):
+        """Список постов отдаётся страницами, ссылка ведёт на следующую."""
+        response = self.client.get(reverse('api:posts'))
+        data = response.json()
+        self.assertEqual(len(data['results']), PAGE_SIZE)
+        self.assertEqual(data['results'][0]['text'], 'Последний')
+        self.assertIsNone(data['previous'])
+        rest = self.client.get(data['next']).json()
+        self.assertEqual(len(rest['results']), 4)
+        self.assertIsNone(rest['next'])
+
+    def test_tampered_cursor_returns_first_page(self):
+        for values in (['n', 1, 2], ['n', '2020-01-01T00:00:00', 'zz']):
+            with self.subTest(values=values):
+                response = self.client.get(
+                    reverse('api:posts'), {'cursor': encode_cursor(*values)}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertIsNone(response.json()['previous'])
+
+    def test_sparse_fields_and_expand(self):
+        """?fields= сужает ответ, ?expand= встраивает автора одним запросом."""
+        url = reverse('api:post_detail', args=[self.post.pk])
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                url, {'fields': 'id,author,group', 'expand': 'author,group'}
+            )
+        self.assertEqual(response.json(), {
+            'id': self.post.pk,
+            'author': {
+                'id': self.user.pk,
+                'username': 'api_author',
+                'first_name': 'Лев',
+                'last_name': 'Толстой',
+            },
+            'group': None,
+        })
+
+    def test_unknown_field_is_rejected(self):
+        """Неизвестное поле в ?fields= даёт 400."""
+        response = self.client.get(reverse('api:posts'), {'fields': 'secret'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_filters_groups_and_comments(self):
+        """Фильтр по группе, список групп и комментарии поста."""
+        in_group = self.client.get(
+            reverse('api:posts'), {'group': self.group.slug, 'limit': 100}
+        ).json()['results']
+        self.assertEqual(len(in_group), PAGE_SIZE + 3)
+        group = self.client.get(
+            reverse('api:group_detail', args=[self.group.slug])
+        ).json()
+        self.assertEqual(group['slug'], 'api-group')
+        comments = self.client.get(
+            reverse('api:comments', args=[self.post.pk])
+        ).json()['results']
+        self.assertEqual([comment['text'] for comment in comments], ['К'])
+
+
+class ApiWriteTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='api_writer')
+        cls.other = User.objects.create_user(username='api_other')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def send(self, method, url, data):
+        return getattr(self.client, method)(
+            url, json.dumps(data), content_type='application/json'
+        )
+
+    def test_guest_cannot_write(self):
+        """Запись без авторизации отклоняется с 401."""
+        response = Client().post(
+            reverse('api:posts'), '{}', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_create_edit_and_delete_post(self):
+        """Автор создаёт, правит и удаляет пост."""
+        created = self.send('post', reverse('api:posts'), {'text': 'Новый'})
+        self.assertEqual(created.status_code, 201)
+        url = reverse('api:post_detail', args=[created.json()['id']])
+        edited = self.send('patch', url, {'text': 'Исправленный'})
+        self.assertEqual(edited.json()['text'], 'Исправленный')
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertFalse(Post.objects.exists())
+
+    def test_only_author_edits_post(self):
+        """Чужой пост изменить нельзя."""
+        post = Post.objects.create(text='Чужой', author=self.other)
+        url = reverse('api:post_detail', args=[post.pk])
+        response = self.send('patch', url, {'text': 'Взлом'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_invalid_post_returns_errors(self):
+        """Пустой текст даёт 400 с ошибками формы."""
+        response = self.send('post', reverse('api:posts'), {'text': ''})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
+
+    def test_follow_and_unfollow(self):
+        """Подписка создаётся, попадает в список и удаляется."""
+        response = self.send(
+            'post', reverse('api:follows'), {'author': 'api_other'}
+        )
+        self.assertEqual(response.status_code, 201)
+        follows = self.client.get(
+            reverse('api:follows'), {'expand': 'author'}
+        ).json()['results']
+        self.assertEqual(follows[0]['author']['username'], 'api_other')
+        response = self.client.delete(
+            reverse('api:follow_detail', args=['api_other'])
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_comment_is_created(self):
+        """Комментарий добавляется к посту."""
+        post = Post.objects.create(text='Пост', author=self.other)
+        response = self.send(
+            'post', reverse('api:comments', args=[post.pk]), {'text': 'Ок'}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['author'], self.user.pk)
@@ -0,0 +1,203 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.forms.models import model_to_dict
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_http_methods
+
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Follow, Group, Post
+from posts.paginator import CursorPaginator
+
+from .serializers import COMMENTS, FOLLOWS, GROUPS, POSTS, FieldError
+
+User = get_user_model()
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _error(status, detail, **extra):
+    return JsonResponse({'detail': detail, **extra}, status=status)
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        return PAGE_SIZE
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def _page_url(request, cursor):
+    if not cursor:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return f'{request.path}?{params.urlencode()}'
+
+
+def _listing(request, queryset, resource, ordering=('-pub_date', '-id')):
+    """Страница списка по курсору в виде JSON."""
+    try:
+        plan = resource.plan(
+            request.GET.get('fields'), request.GET.get('expand')
+        )
+    except FieldError as error:
+        return _error(400, str(error))
+    keys = [name.lstrip('-') for name in ordering]
+    rows = queryset.values(*resource.columns(plan, required=keys))
+    page = CursorPaginator(
+        rows, _page_size(request), ordering=ordering
+    ).cursor_page(request.GET.get('cursor'))
+    return JsonResponse({
+        'results': [resource.dump(row, plan) for row in page],
+        'next': _page_url(request, page.next_cursor),
+        'previous': _page_url(request, page.previous_cursor),
+    })
+
+
+def _detail(request, queryset, resource, status=200, **lookup):
+    try:
+        plan = resource.plan(
+            request.GET.get('fields'), request.GET.get('expand')
+        )
+    except FieldError as error:
+        return _error(400, str(error))
+    row = queryset.filter(**lookup).values(*resource.columns(plan)).first()
+    if row is None:
+        return _error(404, 'Не найдено.')
+    return JsonResponse(resource.dump(row, plan), status=status)
+
+
+def _json_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _save_form(request, form_class, instance=None, **attrs):
+    """Проверяет тело запроса формой и сохраняет объект.
+
+    Возвращает пару (объект, ответ с ошибкой); одно из двух — None.
+    """
+    data = _json_body(request)
+    if data is None:
+        return None, _error(400, 'Тело запроса должно быть объектом JSON.')
+    if instance is not None:
+        # PATCH меняет только переданные поля.
+        data = {**model_to_dict(instance, form_class.Meta.fields), **data}
+    form = form_class(data, instance=instance)
+    if not form.is_valid():
+        return None, _error(400, 'Неверные данные.', errors=form.errors)
+    obj = form.save(commit=False)
+    for name, value in attrs.items():
+        setattr(obj, name, value)
+    obj.save()
+    return obj, None
+
+
+@require_http_methods(['GET', 'POST'])
+def posts(request):
+    if request.method == 'POST':
+        if not request.user.is_authenticated:
+            return _error(401, 'Нужна авторизация.')
+        post, error = _save_form(request, PostForm, author=request.user)
+        if error:
+            return error
+        return _detail(request, Post.objects, POSTS, status=201, pk=post.pk)
+    queryset = Post.objects.all()
+    if request.GET.get('group'):
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        queryset = queryset.filter(author__username=request.GET['author'])
+    return _listing(request, queryset, POSTS)
+
+
+@require_http_methods(['GET', 'PATCH', 'DELETE'])
+def post_detail(request, post_id):
+    if request.method == 'GET':
+        return _detail(request, Post.objects, POSTS, pk=post_id)
+    if not request.user.is_authenticated:
+        return _error(401, 'Нужна авторизация.')
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return _error(404, 'Не найдено.')
+    if post.author_id != request.user.pk:
+        return _error(403, 'Изменять пост может только автор.')
+    if request.method == 'DELETE':
+        post.delete()
+        return HttpResponse(status=204)
+    post, error = _save_form(request, PostForm, instance=post)
+    if error:
+        return error
+    return _detail(request, Post.objects, POSTS, pk=post.pk)
+
+
+@require_http_methods(['GET'])
+def groups(request):
+    return _listing(request, Group.objects.all(), GROUPS, ordering=('id',))
+
+
+@require_http_methods(['GET'])
+def group_detail(request, slug):
+    return _detail(request, Group.objects, GROUPS, slug=slug)
+
+
+@require_http_methods(['GET', 'POST'])
+def comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return _error(404, 'Не найдено.')
+    if request.method == 'POST':
+        if not request.user.is_authenticated:
+            return _error(401, 'Нужна авторизация.')
+        comment, error = _save_form(
+            request, CommentForm, author=request.user, post_id=post_id
+        )
+        if error:
+            return error
+        return _detail(
+            request, Comment.objects, COMMENTS, status=201, pk=comment.pk
+        )
+    return _listing(
+        request, Comment.objects.filter(post_id=post_id), COMMENTS,
+        ordering=('created', 'id'),
+    )
+
+
+@require_http_methods(['GET', 'POST'])
+def follows(request):
+    if not request.user.is_authenticated:
+        return _error(401, 'Нужна авторизация.')
+    if request.method == 'GET':
+        return _listing(
+            request, Follow.objects.filter(user=request.user), FOLLOWS,
+            ordering=('id',),
+        )
+    data = _json_body(request) or {}
+    author = User.objects.filter(username=data.get('author')).first()
+    if author is None:
+        return _error(400, 'Автор не найден.')
+    if author.pk == request.user.pk:
+        return _error(400, 'Нельзя подписаться на себя.')
+    follow, created = Follow.objects.get_or_create(
+        user=request.user, author=author
+    )
+    return _detail(
+        request, Follow.objects, FOLLOWS,
+        status=201 if created else 200, pk=follow.pk,
+    )
+
+
+@require_http_methods(['DELETE'])
+def follow_detail(request, username):
+    if not request.user.is_authenticated:
+        return _error(401, 'Нужна авторизация.')
+    deleted, _ = Follow.objects.filter(
+        user=request.user, author__username=username
+    ).delete()
+    if not deleted:
+        return _error(404, 'Не найдено.')
+    return HttpResponse(status=204)
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import profiling, tasks
+        profiling.install_template_hook()
+        tasks.autodiscover()
@@ -0,0 +1,71 @@
+"""Защита дорогих ключей кэша от одновременного пересчёта.
+
+Значение хранится вместе со временем его вычисления и сроком годности.
+`fetch()` начинает пересчёт чуть раньше истечения срока с вероятностью,
+растущей к концу срока (алгоритм XFetch), а блокировка через
+`cache.add` пускает пересчитывать только один процесс: остальные в это
+время отдают старое значение или недолго ждут нового.
+"""
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+BETA = getattr(settings, 'CACHE_XFETCH_BETA', 1.0)
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 2.0
+LOCK_POLL = 0.05
+
+
+def _lock_key(key):
+    return f'{key}:lock'
+
+
+def _fresh(entry):
+    _, delta, expires = entry
+    # random() может вернуть 0, а логарифм нуля не определён.
+    gap = -delta * BETA * math.log(random.random() or 1e-12)
+    return time.time() + gap < expires
+
+
+def _wait_for(key):
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def _compute(key, compute, timeout, cacheable):
+    started = time.time()
+    value = compute()
+    if cacheable is None or cacheable(value):
+        delta = time.time() - started
+        cache.set(key, (value, delta, time.time() + timeout), timeout)
+    return value
+
+
+def fetch(key, compute, timeout, cacheable=None):
+    """Значение из кэша или результат `compute()`; возвращает (значение, hit).
+
+    `cacheable(value)` решает, сохранять ли вычисленное значение.
+    """
+    entry = cache.get(key)
+    if entry is not None and _fresh(entry):
+        return entry[0], True
+    lock = _lock_key(key)
+    if not cache.add(lock, 1, LOCK_TIMEOUT):
+        if entry is not None:
+            return entry[0], True
+        entry = _wait_for(key)
+        if entry is not None:
+            return entry[0], True
+        return _compute(key, compute, timeout, cacheable), False
+    try:
+        return _compute(key, compute, timeout, cacheable), False
+    finally:
+        cache.delete(lock)
@@ -0,0 +1,38 @@
+"""Файловый кэш с атомарным `add()` для `CACHE_URL=file://...`.
+
+В `FileBasedCache` из Django `add()` — это проверка и запись двумя
+шагами: два процесса могут одновременно «взять» одну блокировку
+`core.cache.fetch()` и оба пересчитать страницу. Здесь значение
+пишется во временный файл, а на место ключа ставится жёсткой ссылкой:
+`os.link`, как и `open(O_CREAT | O_EXCL)`, создаёт файл только если его
+ещё нет, но другие процессы не увидят его недописанным.
+
+`incr()` остаётся неатомарным (чтение и запись): при гонке одно из
+увеличений теряется. Для версий страниц это безопасно — версия всё
+равно меняется, — а счётчики статистики кэша могут немного отстать.
+"""
+import os
+import tempfile
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class FileCache(FileBasedCache):
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # has_key() заодно удаляет файл с истёкшим сроком.
+        if self.has_key(key, version):
+            return False
+        self._createdir()
+        fname = self._key_to_file(key, version)
+        self._cull()
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        try:
+            with open(fd, 'wb') as f:
+                self._write_content(f, timeout, value)
+            os.link(tmp_path, fname)
+        except FileExistsError:
+            return False
+        finally:
+            os.remove(tmp_path)
+        return True
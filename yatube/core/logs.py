@@ -0,0 +1,21 @@
+import json
+import logging
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись журнала — одна строка JSON.
+
+    Поля события передаются через `extra={'data': {...}}`.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage(),
+        }
+        entry.update(getattr(record, 'data', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core import metrics, tasks
+
+
+def _execute(job):
+    try:
+        return tasks.execute(job)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задания очереди core.tasks в пуле потоков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Число потоков, выполняющих задания; 0 — текущий поток.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help='Сколько заданий забирать из очереди за раз.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задания и завершиться.',
+        )
+        parser.add_argument(
+            '--retry-dead', action='store_true',
+            help='Сначала вернуть в очередь невыполненные задания.',
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_dead']:
+            returned = tasks.retry_dead()
+            self.stdout.write(f'Возвращено в очередь: {returned}')
+        if options['workers'] > 0:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                done, failed = self.work(pool.map, _execute, options)
+        else:
+            done, failed = self.work(map, tasks.execute, options)
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено заданий: {done}, с ошибкой: {failed}'
+        ))
+
+    def work(self, run_all, execute, options):
+        done = failed = 0
+        while True:
+            batch = tasks.claim(options['batch_size'])
+            if not batch:
+                if options['once']:
+                    return done, failed
+                time.sleep(options['interval'])
+                continue
+            results = list(run_all(execute, batch))
+            done += sum(results)
+            failed += len(results) - sum(results)
+            metrics.flush()
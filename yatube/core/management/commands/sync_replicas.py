@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import replicas
+
+SQLITE = 'django.db.backends.sqlite3'
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу SQLite в файлы реплик.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять копирование каждые N секунд; 0 — один раз.',
+        )
+
+    def handle(self, *args, **options):
+        aliases = replicas.aliases()
+        if not aliases:
+            raise CommandError(
+                'Реплики не настроены: задайте DATABASE_REPLICAS.'
+            )
+        for alias in ['default', *aliases]:
+            if connections[alias].settings_dict['ENGINE'] != SQLITE:
+                raise CommandError(
+                    f'База {alias} не SQLite: реплики других СУБД '
+                    'обновляет их собственная репликация.'
+                )
+        while True:
+            started = time.perf_counter()
+            synced = replicas.sync()
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stdout.write(
+                f'Обновлено реплик: {len(synced)} за {elapsed:.0f} мс'
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,304 @@
+"""Метрики приложения в текстовом формате Prometheus.
+
+Каждый процесс копит счётчики и гистограммы в памяти и раз в
+`FLUSH_INTERVAL` секунд сбрасывает их в свой файл `<pid>.json` в
+`METRICS_DIR`. Представление `/metrics` суммирует файлы всех процессов,
+поэтому работает и при нескольких воркерах WSGI, и с отдельными
+процессами вроде `thumbnail_worker`. Значения завершившихся процессов
+при сборе переносятся в общий файл `dead.json`, поэтому `METRICS_DIR`
+должен быть общим только для процессов одного пространства pid (одного
+хоста или контейнера).
+"""
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+METRICS_DIR = getattr(
+    settings, 'METRICS_DIR',
+    os.path.join(tempfile.gettempdir(), 'yatube_metrics'),
+)
+FLUSH_INTERVAL = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+AGGREGATE_FILE = 'dead.json'
+
+HELP = {
+    'yatube_requests_total': ('counter', 'Запросы по представлениям.'),
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время ответа представления.'
+    ),
+    'yatube_db_queries': (
+        'histogram', 'SQL-запросов на один запрос к представлению.'
+    ),
+    'yatube_page_cache_requests_total': (
+        'counter', 'Обращения к кэшу страниц.'
+    ),
+    'yatube_page_cache_hit_ratio': ('gauge', 'Доля попаданий кэша страниц.'),
+    'yatube_thumbnails_total': ('counter', 'Обработанные миниатюры.'),
+    'yatube_tasks_total': ('counter', 'Выполненные задания очереди.'),
+}
+
+
+class Registry:
+    """Значения метрик одного процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.pid = os.getpid()
+        self.flushed = time.monotonic()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+
+    def _check_fork(self):
+        # После fork дочерний процесс не должен повторять чужие значения.
+        if os.getpid() != self.pid:
+            self.__init__()
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self._check_fork()
+            self.counters[key] += value
+        self.maybe_flush()
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self._check_fork()
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'buckets': list(buckets),
+                    'counts': [0] * len(buckets),
+                    'sum': 0.0,
+                    'count': 0,
+                }
+            for index, bound in enumerate(histogram['buckets']):
+                if value <= bound:
+                    histogram['counts'][index] += 1
+                    break
+            histogram['sum'] += value
+            histogram['count'] += 1
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self.lock:
+            self._check_fork()
+            return {
+                'counters': [
+                    [name, labels, value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                'histograms': [
+                    [name, labels, dict(histogram, counts=list(
+                        histogram['counts']
+                    ))]
+                    for (name, labels), histogram in self.histograms.items()
+                ],
+            }
+
+    def _due(self):
+        return time.monotonic() - self.flushed >= FLUSH_INTERVAL
+
+    def maybe_flush(self):
+        # Поток запроса не ждёт, если файл уже пишет другой поток.
+        if not self._due() or not self.flush_lock.acquire(blocking=False):
+            return
+        try:
+            if self._due():
+                self._write()
+        finally:
+            self.flush_lock.release()
+
+    def flush(self):
+        with self.flush_lock:
+            self._write()
+
+    def _write(self):
+        self.flushed = time.monotonic()
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        _write_json(
+            os.path.join(METRICS_DIR, f'{os.getpid()}.json'),
+            self.snapshot(),
+        )
+
+
+def _write_json(path, data):
+    """Атомарно заменяет файл: читатели видят старую или новую версию."""
+    descriptor, temporary = tempfile.mkstemp(
+        prefix=f'{os.getpid()}.', suffix='.tmp', dir=os.path.dirname(path)
+    )
+    try:
+        with os.fdopen(descriptor, 'w') as f:
+            json.dump(data, f)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+registry = Registry()
+
+
+def inc(name, value=1, **labels):
+    registry.inc(name, labels, value)
+
+
+def observe(name, value, buckets=DURATION_BUCKETS, **labels):
+    registry.observe(name, labels, value, buckets)
+
+
+def flush():
+    registry.flush()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # процесс есть, но принадлежит другому пользователю
+    return True
+
+
+def _dead(filename):
+    pid = filename.split('.', 1)[0]
+    return pid.isdigit() and int(pid) != os.getpid() and not _alive(int(pid))
+
+
+def _load(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(counters, histograms, data):
+    for name, labels, value in data['counters']:
+        counters[(name, tuple(map(tuple, labels)))] += value
+    for name, labels, histogram in data['histograms']:
+        key = (name, tuple(map(tuple, labels)))
+        total = histograms.setdefault(key, dict(
+            histogram, counts=[0] * len(histogram['counts']),
+            sum=0.0, count=0,
+        ))
+        total['counts'] = [
+            a + b for a, b in zip(total['counts'], histogram['counts'])
+        ]
+        total['sum'] += histogram['sum']
+        total['count'] += histogram['count']
+
+
+@contextmanager
+def _merge_lock():
+    with open(os.path.join(METRICS_DIR, 'merge.lock'), 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _retire_dead():
+    """Переносит значения завершившихся процессов в `dead.json`.
+
+    Счётчики и гистограммы не должны уменьшаться, когда сервер
+    перезапускает воркер, поэтому их значения не выбрасываются, а
+    копятся в общем файле, как в multiprocess-режиме prometheus_client.
+    """
+    dead = [name for name in os.listdir(METRICS_DIR) if _dead(name)]
+    if not dead:
+        return
+    with _merge_lock():
+        counters, histograms = defaultdict(float), {}
+        aggregate = os.path.join(METRICS_DIR, AGGREGATE_FILE)
+        for path in [aggregate] + [
+            os.path.join(METRICS_DIR, name)
+            for name in dead if name.endswith('.json')
+        ]:
+            data = _load(path)
+            if data is not None:
+                _merge(counters, histograms, data)
+        _write_json(aggregate, {
+            'counters': [
+                [name, labels, value]
+                for (name, labels), value in counters.items()
+            ],
+            'histograms': [
+                [name, labels, histogram]
+                for (name, labels), histogram in histograms.items()
+            ],
+        })
+        for name in dead:
+            try:
+                os.unlink(os.path.join(METRICS_DIR, name))
+            except FileNotFoundError:
+                pass  # уже перенёс соседний сбор метрик
+
+
+def collect():
+    """Сумма значений всех процессов из METRICS_DIR."""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    _retire_dead()
+    counters = defaultdict(float)
+    histograms = {}
+    for filename in os.listdir(METRICS_DIR):
+        if not filename.endswith('.json'):
+            continue
+        data = _load(os.path.join(METRICS_DIR, filename))
+        if data is not None:
+            _merge(counters, histograms, data)
+    return counters, histograms
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('"', '\\"'))
+        for name, value in pairs
+    ) + '}'
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _histogram_lines(name, labels, histogram):
+    cumulative = 0
+    for bound, count in zip(histogram['buckets'], histogram['counts']):
+        cumulative += count
+        yield f'{name}_bucket{_labels(labels, le=bound)} {cumulative}'
+    yield f'{name}_bucket{_labels(labels, le="+Inf")} {histogram["count"]}'
+    yield f'{name}_sum{_labels(labels)} {_number(histogram["sum"])}'
+    yield f'{name}_count{_labels(labels)} {histogram["count"]}'
+
+
+def render(counters, histograms, gauges=()):
+    """Текст в формате Prometheus; `gauges` — пары (ключ, значение)."""
+    gauges = list(gauges)
+    series = defaultdict(list)
+    for (name, labels), value in sorted(list(counters.items()) + gauges):
+        series[name].append(f'{name}{_labels(labels)} {_number(value)}')
+    for (name, labels), histogram in sorted(histograms.items()):
+        series[name].extend(_histogram_lines(name, labels, histogram))
+    lines = []
+    for name in sorted(series):
+        kind, description = HELP.get(name, ('untyped', name))
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(series[name])
+    return '\n'.join(lines) + '\n'
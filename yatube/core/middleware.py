@@ -0,0 +1,154 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, profiling, replicas
+
+SAMPLE_RATE = getattr(settings, 'PROFILING_SAMPLE_RATE', 1.0)
+SLOW_REQUEST_MS = getattr(settings, 'PROFILING_SLOW_REQUEST_MS', 500)
+REPLICA_VIEWS = getattr(settings, 'DATABASE_REPLICA_VIEWS', ())
+STICKY_SECONDS = getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 10)
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+logger = logging.getLogger('yatube.profiling')
+
+
+class ProfilingMiddleware:
+    """Считает SQL, время шаблонов и кэш для каждого запроса.
+
+    Итог уходит в заголовок `Server-Timing`, медленные запросы и
+    медленные SQL-запросы — в журнал `yatube.profiling`. Запросы вне
+    выборки (`PROFILING_SAMPLE_RATE`) только засекают общее время.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        if random.random() >= SAMPLE_RATE:
+            response = self.get_response(request)
+            self.finish(request, response, started, None)
+            return response
+        profile = profiling.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            profiling.stop()
+        self.finish(request, response, started, profile)
+        return response
+
+    def finish(self, request, response, started, profile):
+        total = (time.perf_counter() - started) * 1000
+        timings = [f'total;dur={total:.1f}']
+        data = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(total, 1),
+        }
+        if profile is not None:
+            timings += [
+                f'db;dur={profile.sql_ms:.1f};desc="{profile.queries} SQL"',
+                f'tpl;dur={profile.template_ms:.1f}',
+                f'cache;desc="{profile.cache_hits} hit, '
+                f'{profile.cache_misses} miss"',
+            ]
+            data.update(
+                queries=profile.queries,
+                sql_ms=round(profile.sql_ms, 1),
+                template_ms=round(profile.template_ms, 1),
+                cache_hits=profile.cache_hits,
+                cache_misses=profile.cache_misses,
+            )
+            self.log_slow_queries(request, profile)
+        response['Server-Timing'] = ', '.join(timings)
+        if total >= SLOW_REQUEST_MS:
+            logger.warning('slow_request', extra={'data': data})
+
+    def log_slow_queries(self, request, profile):
+        for sql, elapsed in profile.slow_queries:
+            logger.warning('slow_query', extra={'data': {
+                'path': request.path,
+                'fingerprint': profiling.fingerprint(sql),
+                'sql': profiling.normalize(sql),
+                'duration_ms': round(elapsed, 1),
+            }})
+
+
+class MetricsMiddleware:
+    """Считает запросы, время ответа и SQL по именам представлений.
+
+    Число SQL-запросов берётся из профиля `ProfilingMiddleware`, поэтому
+    известно только для запросов, попавших в выборку.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = request.resolver_match
+        if match is None:
+            return response
+        view = match.view_name
+        metrics.inc(
+            'yatube_requests_total',
+            view=view, method=request.method, status=response.status_code,
+        )
+        metrics.observe(
+            'yatube_request_duration_seconds',
+            time.perf_counter() - started, view=view,
+        )
+        profile = profiling.current()
+        if profile is not None:
+            metrics.observe(
+                'yatube_db_queries', profile.queries,
+                buckets=metrics.QUERY_BUCKETS, view=view,
+            )
+        return response
+
+
+class ReplicaMiddleware:
+    """Направляет чтение страниц из `DATABASE_REPLICA_VIEWS` на реплику.
+
+    Реплика выбирается одна на весь запрос, так что страница не
+    смешивает данные копий с разным отставанием.
+
+    После запроса с записью ставит cookie, с которой запросы клиента
+    читают основную базу, пока реплики не догонят её.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            replicas.use_replica(False)
+        if replicas.aliases() and request.method not in SAFE_METHODS:
+            response.set_cookie(
+                replicas.STICKY_COOKIE, '1', max_age=STICKY_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            replicas.aliases()
+            and request.method in ('GET', 'HEAD')
+            and request.resolver_match.view_name in REPLICA_VIEWS
+            and replicas.STICKY_COOKIE not in request.COOKIES
+        ):
+            replicas.use_replica()
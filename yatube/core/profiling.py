@@ -0,0 +1,180 @@
+"""Замеры одного запроса: SQL, рендеринг шаблонов и кэш.
+
+Профиль запроса живёт в thread-local, пока его держит
+`core.middleware.ProfilingMiddleware`; вне запроса, а также для
+запросов, не попавших в выборку, хуки ничего не делают.
+
+`profile_templates()` включает подробный учёт по отдельным шаблонам:
+сколько раз отрендерен каждый шаблон, включая `include`, `extends` и
+inclusion-теги, и сколько времени он занял всего и сам по себе, без
+вложенных шаблонов. Его использует команда `manage.py profile_templates`.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.template.base import Template
+
+SLOW_QUERY_MS = getattr(settings, 'PROFILING_SLOW_QUERY_MS', 100)
+
+_local = threading.local()
+_original_render = Template.render
+
+_LITERALS = re.compile(
+    r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\bIN \([^)]*\)", re.IGNORECASE
+)
+_SPACES = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """SQL без значений: литералы и списки IN заменены на `?`."""
+    sql = _LITERALS.sub(
+        lambda m: 'IN (?)' if m.group(0)[:2].upper() == 'IN' else '?',
+        sql.replace('%s', '?'),
+    )
+    return _SPACES.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    """Короткий хэш запроса, одинаковый для любых параметров."""
+    return hashlib.md5(normalize(sql).encode()).hexdigest()[:12]
+
+
+class RequestProfile:
+    def __init__(self):
+        # Профиль пополняют и потоки пула `posts.parallel`.
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.slow_queries = []
+        self._template_depth = 0
+
+    def execute(self, execute, sql, params, many, context):
+        """Обёртка для `connection.execute_wrapper`."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self.lock:
+                self.queries += 1
+                self.sql_ms += elapsed
+                if elapsed >= SLOW_QUERY_MS:
+                    self.slow_queries.append((sql, elapsed))
+
+
+class TemplateProfile:
+    """Число рендеров и время по именам шаблонов.
+
+    Для каждого шаблона хранится `[рендеров, всего мс, своих мс]`;
+    свои миллисекунды не включают вложенные шаблоны. Блоки дочернего
+    шаблона рендерятся внутри родителя из `extends` и учитываются в нём.
+    """
+
+    def __init__(self):
+        self.stats = defaultdict(lambda: [0, 0.0, 0.0])
+        self._children_ms = []
+
+    def measure(self, render, template, context):
+        self._children_ms.append(0.0)
+        started = time.perf_counter()
+        try:
+            return render(template, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            children = self._children_ms.pop()
+            if self._children_ms:
+                self._children_ms[-1] += elapsed
+            stat = self.stats[_template_name(template)]
+            stat[0] += 1
+            stat[1] += elapsed
+            stat[2] += elapsed - children
+
+    def rows(self):
+        """Строки (шаблон, рендеров, всего мс, своих мс) по своему времени."""
+        return sorted(
+            ((name, *stat) for name, stat in self.stats.items()),
+            key=lambda row: row[3],
+            reverse=True,
+        )
+
+
+@contextmanager
+def profile_templates():
+    """Учитывает все рендеры шаблонов внутри блока `with`.
+
+    Хук ставится на `Template._render` только на время блока, поэтому
+    в обычной работе он ничего не стоит. Рассчитан на один поток.
+    """
+    profile = TemplateProfile()
+    render = Template._render
+
+    def profiled(template, context):
+        return profile.measure(render, template, context)
+
+    Template._render = profiled
+    try:
+        yield profile
+    finally:
+        Template._render = render
+
+
+def start():
+    _local.profile = RequestProfile()
+    return _local.profile
+
+
+def attach(profile):
+    """Делает профиль запроса текущим в другом потоке."""
+    _local.profile = profile
+
+
+def stop():
+    _local.profile = None
+
+
+def current():
+    return getattr(_local, 'profile', None)
+
+
+def record_cache(hit):
+    profile = current()
+    if profile is None:
+        return
+    with profile.lock:
+        if hit:
+            profile.cache_hits += 1
+        else:
+            profile.cache_misses += 1
+
+
+def _profiled_render(self, context):
+    profile = current()
+    if profile is None or profile._template_depth:
+        # Вложенные include и extends уже учтены внешним шаблоном.
+        return _original_render(self, context)
+    profile._template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        profile._template_depth -= 1
+        profile.template_ms += (time.perf_counter() - started) * 1000
+
+
+def _template_name(template):
+    origin = getattr(template, 'origin', None)
+    return getattr(origin, 'template_name', None) or template.name or (
+        '<строка>'
+    )
+
+
+def install_template_hook():
+    Template.render = _profiled_render
@@ -0,0 +1,127 @@
+"""Чтение страниц с реплик базы данных.
+
+Реплики перечисляются в `DATABASE_REPLICAS` (алиасы из `DATABASES`).
+`ReplicaMiddleware` разрешает чтение с реплики только на время GET-запроса
+к представлениям из `DATABASE_REPLICA_VIEWS`; остальные запросы, команды и
+рабочие процессы читают и пишут в `default`. Запись всегда идёт в `default`.
+
+Реплика отстаёт от основной базы, поэтому после записи (POST и другие
+небезопасные методы) клиент получает cookie, и его запросы ещё
+`DATABASE_REPLICA_STICKY_SECONDS` секунд читают основную базу: новый пост
+или комментарий он увидит сразу.
+
+Для SQLite реплики — копии файла основной базы, которые обновляет команда
+`manage.py sync_replicas`. После каждой копии растёт поколение реплик;
+оно входит в ключи кэша страниц (`cache_tag()`), иначе страница,
+прочитанная с отставшей реплики, осталась бы в кэше под новой версией.
+"""
+import random
+import sqlite3
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+STICKY_COOKIE = 'pin_primary'
+GENERATION_KEY = 'replicas:generation'
+PRIMARY_APPS = ('sessions',)
+
+_local = threading.local()
+
+
+def aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def use_replica(alias=True):
+    """Направляет чтение текущего потока на реплику `alias`.
+
+    `True` выбирает случайную реплику один раз: весь запрос читает одну
+    копию, а не смесь копий с разным отставанием. `False` возвращает
+    чтение в основную базу.
+    """
+    if alias is True:
+        replicas = aliases()
+        alias = random.choice(replicas) if replicas else None
+    _local.replica = alias or None
+
+
+def reading_replica():
+    """Алиас реплики, с которой читает текущий поток, или None."""
+    return getattr(_local, 'replica', None)
+
+
+def cache_tag():
+    """Метка источника данных для ключей кэша страниц.
+
+    Страницы с реплики помечаются поколением реплик, а с основной базы —
+    отдельной меткой: иначе клиент после записи получил бы из кэша
+    страницу, которую другой читатель только что собрал с отставшей
+    реплики.
+    """
+    if not aliases():
+        return ''
+    if not reading_replica():
+        return 'primary'
+    return f'replica{cache.get(GENERATION_KEY, 0)}'
+
+
+def _next_generation():
+    if not cache.add(GENERATION_KEY, 1, None):
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, 1, None)
+
+
+class ReplicaRouter:
+    """Читает с реплики, выбранной `ReplicaMiddleware` для запроса.
+
+    Сессии всегда читаются из основной базы: сразу после входа копия на
+    реплике может ещё не появиться.
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = reading_replica()
+        if replica and model._meta.app_label not in PRIMARY_APPS:
+            return replica
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Все базы содержат одни и те же данные.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема попадает на реплики вместе с копией основной базы.
+        return False if db in aliases() else None
+
+
+def copy_sqlite(source, target):
+    """Копирует базу SQLite через backup API, не останавливая читателей."""
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def sync():
+    """Обновляет все реплики SQLite копией основной базы.
+
+    Возвращает список обновлённых алиасов.
+    """
+    source = connections['default'].settings_dict['NAME']
+    synced = []
+    for alias in aliases():
+        connections[alias].close()
+        copy_sqlite(source, connections[alias].settings_dict['NAME'])
+        synced.append(alias)
+    if synced:
+        _next_generation()
+    return synced
@@ -0,0 +1,188 @@
+"""Очередь фоновых заданий в таблице `core.Task`.
+
+Функция, помеченная `@task`, ставится в очередь вызовом `.delay(...)`:
+в той же транзакции, что и изменение данных, создаётся строка `Task`,
+а выполняет её рабочий процесс `manage.py run_tasks`. Упавшее задание
+повторяется с растущей паузой, а исчерпавшее попытки остаётся в таблице
+со статусом `dead` — это очередь «мёртвых» заданий, которую можно
+вернуть в работу командой `run_tasks --retry-dead`.
+
+Пока задание выполняется, его захват (`LEASE`) продлевается. Если
+рабочий процесс умер, захват истекает и задание забирается снова, а
+исчерпавшее попытки уходит в `dead`. Процесс может умереть и после того,
+как задание сделало своё дело, поэтому задания должны быть идемпотентны.
+
+При `TASKS_ALWAYS_EAGER` задание выполняется сразу при вызове `.delay()`;
+так работают тесты и установки без рабочего процесса.
+"""
+import json
+import logging
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from . import metrics
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+LEASE = timedelta(minutes=5)
+RETRY_DELAY = 10
+
+registry = {}
+
+
+def task(func=None, max_attempts=3):
+    """Регистрирует функцию как задание и добавляет ей метод `delay`."""
+    def register(func):
+        name = f'{func.__module__}.{func.__name__}'
+        registry[name] = func
+        func.task_name = name
+        func.delay = lambda *args: enqueue(
+            name, *args, max_attempts=max_attempts
+        )
+        return func
+
+    return register(func) if func is not None else register
+
+
+def autodiscover():
+    """Загружает модули `tasks` всех приложений, чтобы задания нашлись."""
+    autodiscover_modules('tasks')
+
+
+def eager():
+    return getattr(settings, 'TASKS_ALWAYS_EAGER', False)
+
+
+def enqueue(name, *args, max_attempts=3):
+    """Ставит задание в очередь; аргументы должны сериализоваться в JSON."""
+    if eager():
+        return registry[name](*args)
+    Task.objects.create(
+        name=name, args=json.dumps(args), max_attempts=max_attempts
+    )
+    return None
+
+
+def _claimable(now):
+    return Q(status=Task.PENDING, run_at__lte=now) | Q(
+        status=Task.RUNNING, locked_until__lt=now,
+        attempts__lt=F('max_attempts'),
+    )
+
+
+def _bury_abandoned(now):
+    # Задание, на котором рабочий процесс умирает каждый раз, иначе
+    # забиралось бы снова бесконечно.
+    abandoned = Task.objects.filter(
+        status=Task.RUNNING, locked_until__lt=now,
+        attempts__gte=F('max_attempts'),
+    )
+    for pk, name in abandoned.values_list('pk', 'name'):
+        updated = abandoned.filter(pk=pk).update(
+            status=Task.DEAD,
+            locked_until=None,
+            last_error='Захват истёк: рабочий процесс не завершил задание',
+        )
+        if updated:
+            logger.error('Задание %s не выполнено: захват истёк', pk)
+            metrics.inc('yatube_tasks_total', task=name, result='dead')
+
+
+def claim(limit):
+    """Забирает до `limit` готовых заданий в работу.
+
+    Задание захватывается условным UPDATE, поэтому несколько рабочих
+    процессов не возьмут одно и то же. Задания, чей захват истёк
+    (процесс упал), считаются свободными, пока у них остаются попытки.
+    """
+    now = timezone.now()
+    _bury_abandoned(now)
+    candidates = list(Task.objects.filter(_claimable(now)).order_by(
+        'run_at', 'pk'
+    ).values_list('pk', flat=True)[:limit])
+    claimed = []
+    for pk in candidates:
+        updated = Task.objects.filter(_claimable(now), pk=pk).update(
+            status=Task.RUNNING,
+            locked_until=now + LEASE,
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(pk)
+    return list(Task.objects.filter(pk__in=claimed).order_by('run_at', 'pk'))
+
+
+def extend_lease(job):
+    """Продлевает захват выполняющегося задания."""
+    return Task.objects.filter(pk=job.pk, status=Task.RUNNING).update(
+        locked_until=timezone.now() + LEASE
+    )
+
+
+@contextmanager
+def _keep_lease(job):
+    stop = threading.Event()
+
+    def heartbeat():
+        try:
+            while not stop.wait(LEASE.total_seconds() / 2):
+                extend_lease(job)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=heartbeat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def execute(job):
+    """Выполняет захваченное задание, возвращает True при успехе."""
+    try:
+        func = registry[job.name]
+        with _keep_lease(job):
+            func(*json.loads(job.args))
+    except Exception:
+        _fail(job, traceback.format_exc())
+        return False
+    Task.objects.filter(pk=job.pk).delete()
+    metrics.inc('yatube_tasks_total', task=job.name, result='done')
+    return True
+
+
+def _fail(job, error):
+    if job.attempts >= job.max_attempts:
+        logger.error('Задание %s не выполнено:\n%s', job, error)
+        Task.objects.filter(pk=job.pk).update(
+            status=Task.DEAD, locked_until=None, last_error=error
+        )
+        metrics.inc('yatube_tasks_total', task=job.name, result='dead')
+        return
+    delay = RETRY_DELAY * 2 ** (job.attempts - 1)
+    logger.warning('Задание %s будет повторено через %s с', job, delay)
+    Task.objects.filter(pk=job.pk).update(
+        status=Task.PENDING,
+        locked_until=None,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        last_error=error,
+    )
+    metrics.inc('yatube_tasks_total', task=job.name, result='retry')
+
+
+def retry_dead():
+    """Возвращает «мёртвые» задания в очередь, возвращает их число."""
+    return Task.objects.filter(status=Task.DEAD).update(
+        status=Task.PENDING, attempts=0, run_at=timezone.now()
+    )
@@ -0,0 +1,115 @@
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from .. import cache as shared
+from ..filecache import FileCache
+from yatube.settings import cache_from_url
+
+
+class FetchTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return f'value {self.calls}'
+
+    def test_computes_once_then_hits(self):
+        """Второй вызов берёт значение из кэша."""
+        self.assertEqual(
+            shared.fetch('key', self.compute, 60), ('value 1', False)
+        )
+        self.assertEqual(
+            shared.fetch('key', self.compute, 60), ('value 1', True)
+        )
+        self.assertEqual(self.calls, 1)
+
+    def test_recomputes_early_near_expiry(self):
+        """Долгий пересчёт у конца срока начинается заранее."""
+        cache.set('key', ('old', 10.0, time.time() + 1), 60)
+        with mock.patch.object(shared.random, 'random', return_value=0.5):
+            self.assertEqual(
+                shared.fetch('key', self.compute, 60), ('value 1', False)
+            )
+
+    def test_stale_value_while_another_worker_recomputes(self):
+        """Пока ключ пересчитывает другой процесс, отдаётся старое."""
+        cache.set('key', ('old', 10.0, time.time() + 1), 60)
+        cache.add('key:lock', 1)
+        self.assertEqual(shared.fetch('key', self.compute, 60), ('old', True))
+        self.assertEqual(self.calls, 0)
+
+    def test_waits_for_value_without_stale_copy(self):
+        """Без старого значения ждём соседа, а не дождавшись — считаем."""
+        cache.add('key:lock', 1)
+        with mock.patch.object(shared, 'LOCK_WAIT', 0.1):
+            self.assertEqual(
+                shared.fetch('key', self.compute, 60), ('value 1', False)
+            )
+
+    def test_uncacheable_values_are_not_stored(self):
+        """Значение, отклонённое cacheable, не сохраняется."""
+        shared.fetch('key', self.compute, 60, cacheable=lambda value: False)
+        self.assertIsNone(cache.get('key'))
+        self.assertIsNone(cache.get('key:lock'))
+
+
+class FileCacheTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = FileCache(directory.name, {})
+
+    def test_add_only_if_missing_or_expired(self):
+        self.assertTrue(self.cache.add('key', 1, 60))
+        self.assertFalse(self.cache.add('key', 2, 60))
+        self.assertEqual(self.cache.get('key'), 1)
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertTrue(self.cache.add('key', 3, 60))
+            self.assertEqual(self.cache.get('key'), 3)
+
+    def test_concurrent_add_takes_lock_once(self):
+        """Блокировку через add() получает ровно один поток."""
+        start = threading.Barrier(8)
+        results = []
+
+        def take():
+            start.wait()
+            results.append(self.cache.add('lock', 1, 60))
+
+        threads = [threading.Thread(target=take) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(results), [False] * 7 + [True])
+
+
+class CacheFromUrlTest(SimpleTestCase):
+    def test_backends(self):
+        """CACHE_URL выбирает бэкенд общего кэша."""
+        cases = {
+            'locmem://': ('locmem.LocMemCache', None),
+            'file:///tmp/yatube': ('filecache.FileCache', '/tmp/yatube'),
+            'memcached://cache:11211': (
+                'memcached.MemcachedCache', 'cache:11211'
+            ),
+            'memcached:///run/mc.sock': (
+                'memcached.MemcachedCache', 'unix:/run/mc.sock'
+            ),
+        }
+        for url, (backend, location) in cases.items():
+            with self.subTest(url=url):
+                config = cache_from_url(url)
+                self.assertTrue(config['BACKEND'].endswith(backend))
+                self.assertEqual(config.get('LOCATION'), location)
+        self.assertEqual(
+            cache_from_url('redis://cache:6379/1')['LOCATION'],
+            'redis://cache:6379/1',
+        )
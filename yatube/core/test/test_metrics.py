@@ -0,0 +1,132 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import metrics
+from posts.models import Post
+
+User = get_user_model()
+
+
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='posts_author')
+        Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        for name, value in (
+            ('METRICS_DIR', self.directory),
+            ('registry', metrics.Registry()),
+        ):
+            patcher = mock.patch.object(metrics, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.guest_client = Client()
+
+    def scrape(self):
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_views_and_page_cache_are_measured(self):
+        """Запросы, время, SQL и кэш страниц видны в /metrics."""
+        self.guest_client.get(reverse('posts:index'))
+        self.guest_client.get(reverse('posts:index'))
+        body = self.scrape()
+        self.assertIn(
+            'yatube_requests_total{method="GET",status="200",'
+            'view="posts:index"} 2', body
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            body,
+        )
+        self.assertIn('yatube_db_queries_bucket{view="posts:index",', body)
+        self.assertIn('yatube_page_cache_hit_ratio{kind="index"} 0.5', body)
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram', body)
+
+    def test_other_processes_are_summed(self):
+        """Файлы других процессов суммируются с текущим."""
+        with open(os.path.join(self.directory, '1.json'), 'w') as f:
+            json.dump({
+                'counters': [[
+                    'yatube_thumbnails_total', [['result', 'generated']], 3
+                ]],
+                'histograms': [],
+            }, f)
+        metrics.inc('yatube_thumbnails_total', result='generated')
+        self.assertIn(
+            'yatube_thumbnails_total{result="generated"} 4', self.scrape()
+        )
+
+    def test_concurrent_flushes_do_not_collide(self):
+        """Потоки одного процесса пишут файл по очереди, без ошибок."""
+        metrics.inc('yatube_thumbnails_total', result='generated')
+        errors = []
+
+        def flush_many():
+            try:
+                for _ in range(50):
+                    metrics.flush()
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=flush_many) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(self.directory), [f'{os.getpid()}.json'])
+
+    def test_dead_processes_are_merged(self):
+        """Значения завершившегося процесса не пропадают из суммы."""
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        path = os.path.join(self.directory, f'{process.pid}.json')
+        with open(path, 'w') as f:
+            json.dump({
+                'counters': [[
+                    'yatube_thumbnails_total', [['result', 'generated']], 3
+                ]],
+                'histograms': [[
+                    'yatube_db_queries', [['view', 'posts:index']],
+                    {'buckets': [1, 2], 'counts': [1, 0], 'sum': 1.0,
+                     'count': 1},
+                ]],
+            }, f)
+        metrics.inc('yatube_thumbnails_total', result='generated')
+        for _ in range(2):
+            body = self.scrape()
+            self.assertIn(
+                'yatube_thumbnails_total{result="generated"} 4', body
+            )
+            self.assertIn(
+                'yatube_db_queries_count{view="posts:index"} 1', body
+            )
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory, metrics.AGGREGATE_FILE)
+        ))
+
+    def test_remote_clients_are_forbidden(self):
+        """Метрики отдаются только с разрешённых адресов."""
+        response = self.guest_client.get(
+            reverse('metrics'), REMOTE_ADDR='10.0.0.1'
+        )
+        self.assertEqual(response.status_code, 403)
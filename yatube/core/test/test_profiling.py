@@ -0,0 +1,87 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template.base import Template
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import middleware, profiling
+from posts.models import Post
+
+User = get_user_model()
+
+
+class ProfilingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='posts_author')
+        Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_server_timing_header(self):
+        """Заголовок Server-Timing содержит SQL, шаблоны и кэш."""
+        response = self.guest_client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for part in ('total;dur=', 'db;dur=', 'tpl;dur=', '0 hit, 1 miss'):
+            self.assertIn(part, timing)
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertIn('1 hit, 0 miss', response['Server-Timing'])
+
+    def test_unsampled_request_only_times_total(self):
+        """Запрос вне выборки получает только общее время."""
+        with mock.patch.object(middleware, 'SAMPLE_RATE', 0):
+            response = self.guest_client.get(reverse('posts:index'))
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+$')
+
+    def test_slow_queries_are_logged_with_fingerprint(self):
+        """Медленные запросы пишутся в журнал без значений параметров."""
+        with mock.patch.object(profiling, 'SLOW_QUERY_MS', 0), \
+                mock.patch.object(middleware, 'SLOW_REQUEST_MS', 0), \
+                self.assertLogs('yatube.profiling', 'WARNING') as logs:
+            self.guest_client.get(
+                reverse('posts:profile', args=[self.author.username])
+            )
+        events = [record.getMessage() for record in logs.records]
+        self.assertIn('slow_request', events)
+        query = next(r.data for r in logs.records if r.msg == 'slow_query')
+        self.assertNotIn('posts_author', query['sql'])
+        self.assertEqual(len(query['fingerprint']), 12)
+
+    def test_fingerprint_ignores_values(self):
+        """Один и тот же запрос с разными значениями даёт один отпечаток."""
+        self.assertEqual(
+            profiling.fingerprint("SELECT 1 FROM t WHERE a = 'x' LIMIT 10"),
+            profiling.fingerprint("SELECT 1 FROM t WHERE a = 'y' LIMIT 20"),
+        )
+        self.assertEqual(
+            profiling.normalize('SELECT * FROM t WHERE id IN (%s, %s)'),
+            'SELECT * FROM t WHERE id IN (?)',
+        )
+
+
+class TemplateProfileTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_includes_and_own_time(self):
+        """Учитываются страница, её base.html и каждый include."""
+        with profiling.profile_templates() as profile:
+            Client().get(reverse('posts:index'))
+        stats = profile.stats
+        self.assertEqual(stats['posts/index.html'][0], 1)
+        self.assertEqual(stats['base.html'][0], 1)
+        self.assertEqual(stats['includes/header.html'][0], 1)
+        for count, total_ms, own_ms in stats.values():
+            self.assertLessEqual(own_ms, total_ms + 1e-6)
+
+    def test_hook_is_removed_after_block(self):
+        """После блока рендер шаблонов возвращается к исходному."""
+        render = Template._render
+        with profiling.profile_templates():
+            self.assertIsNot(Template._render, render)
+        self.assertIs(Template._render, render)
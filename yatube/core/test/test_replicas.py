@@ -0,0 +1,123 @@
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from .. import replicas
+from posts import cache as page_cache
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica0', 'replica1'])
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = replicas.ReplicaRouter()
+        self.addCleanup(replicas.use_replica, False)
+
+    def test_reads_go_to_replica_only_when_enabled(self):
+        """Вне помеченного запроса чтение идёт в основную базу."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        replicas.use_replica()
+        self.assertIn(
+            self.router.db_for_read(Post), ('replica0', 'replica1')
+        )
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+
+    def test_request_reads_one_replica(self):
+        """Все чтения запроса идут на одну и ту же реплику."""
+        replicas.use_replica()
+        chosen = {self.router.db_for_read(Post) for _ in range(20)}
+        self.assertEqual(chosen, {replicas.reading_replica()})
+        replicas.use_replica(False)
+        self.assertIsNone(replicas.reading_replica())
+
+    def test_writes_and_migrations_stay_on_primary(self):
+        replicas.use_replica()
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertFalse(self.router.allow_migrate('replica0', 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+
+class CopySqliteTest(SimpleTestCase):
+    def test_copy_replaces_replica_contents(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'primary.sqlite3')
+            target = os.path.join(directory, 'replica.sqlite3')
+            with sqlite3.connect(source) as db:
+                db.execute('CREATE TABLE item (name TEXT)')
+                db.execute("INSERT INTO item VALUES ('пост')")
+            db.close()
+            replicas.copy_sqlite(source, target)
+            db = sqlite3.connect(target)
+            self.assertEqual(
+                db.execute('SELECT name FROM item').fetchall(), [('пост',)]
+            )
+            db.close()
+
+
+# Реплика — сама основная база, чтобы запросы выполнялись в тесте.
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        patcher = mock.patch.object(
+            replicas, 'use_replica', wraps=replicas.use_replica
+        )
+        self.use_replica = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_listed_views_read_replica(self):
+        self.client.get(reverse('posts:index'))
+        self.use_replica.assert_any_call()
+        self.assertFalse(replicas.reading_replica())
+
+    def test_other_views_read_primary(self):
+        self.client.get(reverse('posts:post_create'))
+        self.use_replica.assert_called_once_with(False)
+
+    def test_feed_reads_primary(self):
+        """Лента дописывает записи в основную базу и читает их оттуда же."""
+        self.client.get(reverse('posts:follow_index'))
+        self.use_replica.assert_called_once_with(False)
+
+    def test_write_pins_client_to_primary(self):
+        """После записи клиент читает основную базу и видит свой пост."""
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        cookie = response.cookies[replicas.STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], 10)
+        self.use_replica.reset_mock()
+        response = self.client.get(reverse('posts:index'))
+        self.use_replica.assert_called_once_with(False)
+        self.assertContains(response, 'Новый пост')
+
+    def test_page_keys_depend_on_source(self):
+        """Страницы с реплики не попадают читателям основной базы и
+        пересчитываются после синхронизации."""
+        self.addCleanup(replicas.use_replica, False)
+        request = RequestFactory().get('/')
+        request.user = self.user
+        primary = page_cache.page_key(request, 'index')
+        replicas.use_replica()
+        replica = page_cache.page_key(request, 'index')
+        self.assertNotEqual(replica, primary)
+        replicas._next_generation()
+        self.assertNotIn(
+            page_cache.page_key(request, 'index'), (primary, replica)
+        )
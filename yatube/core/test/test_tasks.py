@@ -0,0 +1,107 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import tasks
+from ..models import Task
+from posts.models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+calls = []
+
+
+@tasks.task(max_attempts=2)
+def record(value):
+    calls.append(value)
+
+
+@tasks.task(max_attempts=2)
+def explode():
+    raise RuntimeError('сломалось')
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False)
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_worker(self):
+        call_command('run_tasks', '--once', '--workers=0', stdout=StringIO())
+
+    def test_delay_enqueues_and_worker_runs(self):
+        """delay() создаёт строку, а рабочий процесс выполняет и удаляет её."""
+        record.delay(5)
+        self.assertEqual(calls, [])
+        self.assertEqual(Task.objects.get().name, record.task_name)
+        self.run_worker()
+        self.assertEqual(calls, [5])
+        self.assertFalse(Task.objects.exists())
+
+    def test_failed_task_is_retried_then_dead(self):
+        """Упавшее задание повторяется, а затем уходит в «мёртвые»."""
+        explode.delay()
+        with self.assertLogs('core.tasks', 'WARNING') as logs:
+            self.run_worker()
+        self.assertEqual(logs.records[0].levelname, 'WARNING')
+        self.assertIn('будет повторено', logs.output[0])
+        job = Task.objects.get()
+        self.assertEqual(job.status, Task.PENDING)
+        self.assertGreater(job.run_at, timezone.now())
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.tasks', 'ERROR') as logs:
+            self.run_worker()
+        self.assertIn('сломалось', logs.output[0])
+        job = Task.objects.get()
+        self.assertEqual(job.status, Task.DEAD)
+        self.assertIn('сломалось', job.last_error)
+        self.assertEqual(tasks.retry_dead(), 1)
+        self.assertEqual(Task.objects.get().status, Task.PENDING)
+
+    def test_expired_lease_is_claimed_again(self):
+        """Задание упавшего процесса снова забирается после истечения."""
+        record.delay(1)
+        self.assertEqual(len(tasks.claim(10)), 1)
+        self.assertEqual(tasks.claim(10), [])
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        self.assertEqual(len(tasks.claim(10)), 1)
+
+    def test_abandoned_task_goes_dead(self):
+        """Задание, исчерпавшее попытки на упавших процессах, не
+        забирается снова, а уходит в «мёртвые»."""
+        record.delay(1)
+        tasks.claim(10)
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        tasks.claim(10)
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        with self.assertLogs('core.tasks', 'ERROR') as logs:
+            self.assertEqual(tasks.claim(10), [])
+        job = Task.objects.get()
+        self.assertIn(f'Задание {job.pk} не выполнено', logs.output[0])
+        self.assertEqual(job.status, Task.DEAD)
+        self.assertEqual(job.attempts, 2)
+
+    def test_running_task_lease_is_extended(self):
+        record.delay(1)
+        job = tasks.claim(10)[0]
+        Task.objects.update(locked_until=timezone.now())
+        self.assertEqual(tasks.extend_lease(job), 1)
+        self.assertGreater(
+            Task.objects.get().locked_until,
+            timezone.now() + tasks.LEASE - timedelta(minutes=1),
+        )
+
+    def test_post_signals_enqueue_fan_out(self):
+        """Новый пост попадает в ленты только после работы очереди."""
+        reader = User.objects.create(username='reader')
+        author = User.objects.create(username='author')
+        Follow.objects.create(user=reader, author=author)
+        self.run_worker()
+        Post.objects.create(author=author, text='Пост')
+        self.assertFalse(FeedEntry.objects.exists())
+        self.run_worker()
+        self.assertTrue(FeedEntry.objects.filter(user=reader).exists())
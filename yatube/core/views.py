@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.http import HttpResponse
 from django.shortcuts import render
 
+from . import metrics as app_metrics
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +19,33 @@ def permission_denied(request, exception):
 
 def server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+def metrics(request):
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+    if request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponse(status=403)
+    app_metrics.flush()
+    counters, histograms = app_metrics.collect()
+    return HttpResponse(
+        app_metrics.render(
+            counters, histograms, _page_cache_ratios(counters)
+        ),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+def _page_cache_ratios(counters):
+    totals = {}
+    for (name, labels), value in counters.items():
+        if name != 'yatube_page_cache_requests_total':
+            continue
+        labels = dict(labels)
+        hits, total = totals.get(labels['kind'], (0, 0))
+        if labels['outcome'] == 'hit':
+            hits += value
+        totals[labels['kind']] = (hits, total + value)
+    return [
+        (('yatube_page_cache_hit_ratio', (('kind', kind),)), hits / total)
+        for kind, (hits, total) in totals.items()
+    ]
@@ -0,0 +1,111 @@
+"""Кэш авторов по имени пользователя.
+
+Страницы профиля и подписки ищут автора по `username`. Короткая сводка
+(id, имя, фамилия) хранится в двух уровнях: небольшой LRU в памяти
+процесса с коротким сроком жизни и общий кэш за ним. Сигналы `User`
+сбрасывают запись при сохранении и удалении пользователя; другие
+процессы увидят изменение не позже чем через `LOCAL_TTL` секунд.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.http import Http404
+
+User = get_user_model()
+
+AUTHOR_FIELDS = ('id', 'username', 'first_name', 'last_name')
+LOCAL_SIZE = 1024
+LOCAL_TTL = 30
+SHARED_TIMEOUT = 60 * 60
+
+
+class LRUCache:
+    """Ограниченный по размеру кэш с истечением записей по времени."""
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.items[key] = (time.monotonic() + self.ttl, value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+local = LRUCache(LOCAL_SIZE, LOCAL_TTL)
+
+
+def _key(username):
+    return f'author:{username}'
+
+
+def _summary(username):
+    values = local.get(username)
+    if values is not None:
+        return values
+    values = cache.get(_key(username))
+    if values is None:
+        values = User.objects.filter(username=username).values_list(
+            *AUTHOR_FIELDS
+        ).first()
+        if values is None:
+            return None
+        cache.set(_key(username), values, SHARED_TIMEOUT)
+    local.set(username, values)
+    return values
+
+
+def get_author(username):
+    """Пользователь с загруженными AUTHOR_FIELDS или None.
+
+    Остальные поля отложены и подгрузятся отдельным запросом, если к
+    ним обратиться.
+    """
+    values = _summary(username)
+    if values is None:
+        return None
+    return User.from_db(
+        router.db_for_read(User), AUTHOR_FIELDS, list(values)
+    )
+
+
+def get_author_or_404(username):
+    author = get_author(username)
+    if author is None:
+        raise Http404(f'Пользователь {username} не найден')
+    return author
+
+
+def forget(*usernames):
+    """Сбрасывает кэш перечисленных имён."""
+    for username in usernames:
+        local.delete(username)
+    cache.delete_many([_key(username) for username in usernames])
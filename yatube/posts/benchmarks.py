@@ -0,0 +1,218 @@
+"""Нагрузочные замеры страниц с постами.
+
+`generate()` наполняет базу заданным объёмом пользователей, групп,
+постов, комментариев и подписок (Faker + `bulk_create`), `run()`
+запрашивает основные страницы и те же данные через JSON API тестовым
+клиентом и собирает p50/p95 времени ответа, число SQL-запросов и
+размер ответа, а `compare()` сверяет результат
+с сохранённым базовым замером. Всё вместе запускает команда
+`manage.py benchmark_posts` на отдельной тестовой базе.
+"""
+import random
+import statistics
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+
+from . import feed, groups, search, stats
+from .models import Comment, Follow, Group, Post
+from .transfer import keep_pub_date
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+DEFAULT_VOLUMES = {
+    'users': 200,
+    'groups': 10,
+    'posts': 5000,
+    'comments': 10000,
+    'follows': 2000,
+}
+METRICS = ('p50_ms', 'p95_ms', 'queries')
+
+
+def _bulk(model, objects):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, BATCH_SIZE))
+        if not batch:
+            return
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _follow_pairs(rng, user_ids, count):
+    count = min(count, len(user_ids) * (len(user_ids) - 1))
+    pairs = set()
+    while len(pairs) < count:
+        user_id, author_id = rng.sample(user_ids, 2)
+        pairs.add((user_id, author_id))
+    return pairs
+
+
+def generate(seed=0, **volumes):
+    """Наполняет базу данными; объёмы берутся из DEFAULT_VOLUMES."""
+    volumes = {**DEFAULT_VOLUMES, **volumes}
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    _bulk(User, (
+        User(
+            username=f'{fake.user_name()}{number}',
+            first_name=fake.first_name(),
+            last_name=fake.last_name(),
+            password='!',
+        )
+        for number in range(volumes['users'])
+    ))
+    _bulk(Group, (
+        Group(
+            title=fake.catch_phrase(),
+            slug=f'group-{number}',
+            description=fake.text(),
+        )
+        for number in range(volumes['groups'])
+    ))
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    group_ids = list(Group.objects.values_list('pk', flat=True)) + [None]
+    now = timezone.now()
+    with keep_pub_date():
+        _bulk(Post, (
+            Post(
+                author_id=rng.choice(user_ids),
+                group_id=rng.choice(group_ids),
+                text=fake.text(max_nb_chars=600),
+                pub_date=now - timedelta(minutes=rng.randrange(525600)),
+            )
+            for _ in range(volumes['posts'])
+        ))
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+    _bulk(Comment, (
+        Comment(
+            post_id=rng.choice(post_ids),
+            author_id=rng.choice(user_ids),
+            text=fake.sentence(),
+        )
+        for _ in range(volumes['comments'] if post_ids else 0)
+    ))
+    _bulk(Follow, (
+        Follow(user_id=user_id, author_id=author_id)
+        for user_id, author_id in _follow_pairs(
+            rng, user_ids, volumes['follows']
+        )
+    ))
+    _apply_side_effects()
+
+
+def _apply_side_effects():
+    """То, что при обычной записи сделали бы сигналы."""
+    stats.reconcile()
+    groups.recount()
+    search.rebuild()
+    posts = Post.objects.order_by('pk').values_list(
+        'pk', 'author_id', 'pub_date'
+    ).iterator(chunk_size=BATCH_SIZE)
+    while True:
+        batch = list(islice(posts, BATCH_SIZE))
+        if not batch:
+            return
+        feed.fan_out_many(batch)
+
+
+def scenarios():
+    """Страницы для замера: имя, адрес и пользователь (или None)."""
+    post = Post.objects.annotate(
+        comment_total=Count('comments')
+    ).order_by('-comment_total').first()
+    group = Group.objects.annotate(
+        post_total=Count('posts')
+    ).order_by('-post_total').first()
+    reader = User.objects.annotate(
+        following_total=Count('follower')
+    ).order_by('-following_total').first()
+    return [
+        ('index', reverse('posts:index'), None),
+        ('group_posts', reverse('posts:group_list', args=[group.slug]),
+         None),
+        ('profile', reverse('posts:profile', args=[post.author.username]),
+         None),
+        ('post_detail', reverse('posts:post_detail', args=[post.pk]), None),
+        ('follow_index', reverse('posts:follow_index'), reader),
+        ('api_posts', reverse('api:posts') + '?expand=author,group', None),
+        ('api_group_posts',
+         reverse('api:posts') + f'?group={group.slug}&expand=author', None),
+        ('api_post_detail',
+         reverse('api:post_detail', args=[post.pk]) + '?expand=author,group',
+         None),
+        ('api_comments', reverse('api:comments', args=[post.pk]), None),
+    ]
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    index = round(percent / 100 * (len(values) - 1))
+    return values[index]
+
+
+def measure(client, url, repeat=20, cold=False):
+    """Замеряет один адрес: время ответа, число запросов и размер ответа."""
+    timings, queries = [], []
+    for _ in range(repeat):
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} вернул {response.status_code}')
+        queries.append(len(captured))
+    return {
+        'bytes': len(response.content),
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(_percentile(timings, 95), 2),
+        'queries': max(queries),
+    }
+
+
+def run(repeat=20, cold=False):
+    """Замеряет все сценарии, возвращает результаты по именам."""
+    results = {}
+    for name, url, user in scenarios():
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        cache.clear()
+        results[name] = measure(client, url, repeat=repeat, cold=cold)
+    return results
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Список регрессий относительно базового замера.
+
+    Время может вырасти не больше чем на долю `tolerance`, а число
+    запросов не должно расти вовсе.
+    """
+    regressions = []
+    for name, current in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for metric in METRICS:
+            limit = expected[metric]
+            if metric != 'queries':
+                limit *= 1 + tolerance
+            if current[metric] > limit:
+                regressions.append(
+                    f'{name}.{metric}: {current[metric]} > {limit:g}'
+                )
+    return regressions
@@ -0,0 +1,239 @@
+"""Версионный кэш страниц с постами.
+
+Ключ страницы включает номер версии её пространства имён (`index`,
+`group:<id>`). Сигналы моделей увеличивают версию при любом изменении
+постов, поэтому страницы можно держать в кэше часами: новый пост
+появляется сразу, а старые ключи просто перестают запрашиваться.
+
+Те же версии служат валидаторами условных GET-запросов: ETag строится
+из версий пространств имён страницы, а Last-Modified — из времени их
+последнего изменения, которое `bump()` запоминает рядом с версией.
+
+Кэш в памяти процесса (`LocMemCache`, по умолчанию) не видит версий,
+поднятых другими воркерами, поэтому с ним страницы, версии и их метки
+живут всего `LOCAL_TIMEOUT` секунд: иначе воркер, не получивший
+изменения, отдавал бы старую страницу и старый ETag часами.
+
+В ключи и ETag входит источник данных (`core.replicas.cache_tag()`):
+страница, прочитанная с отставшей реплики, пересчитывается после её
+синхронизации и не достаётся клиенту, читающему основную базу.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.views.decorators.http import condition
+
+from core import metrics, profiling, replicas
+from core.cache import fetch
+
+LOCAL_TIMEOUT = 20
+PROCESS_LOCAL = isinstance(caches['default'], LocMemCache)
+PAGE_CACHE_TIMEOUT = getattr(
+    settings, 'POSTS_PAGE_CACHE_TIMEOUT',
+    LOCAL_TIMEOUT if PROCESS_LOCAL else 60 * 60 * 6,
+)
+VERSION_TIMEOUT = LOCAL_TIMEOUT if PROCESS_LOCAL else None
+PAGE_PARAMS = ('cursor', 'page')
+STATS_KINDS = ('index', 'group')
+
+
+def _version_key(namespace):
+    return f'version:{namespace}'
+
+
+def _initial_version():
+    # Версия, созданная заново после вытеснения ключа, не должна
+    # совпасть со старой, иначе оживут устаревшие страницы.
+    return int(time.time() * 1000)
+
+
+def _modified_key(namespace):
+    return f'modified:{namespace}'
+
+
+def get_version(namespace):
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(namespaces):
+    """Версии нескольких пространств имён одним запросом к кэшу."""
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(list(keys))
+    return [
+        found.get(key) or get_version(namespace)
+        for key, namespace in keys.items()
+    ]
+
+
+def bump(*namespaces):
+    """Инвалидирует все страницы перечисленных пространств имён."""
+    for namespace in namespaces:
+        key = _version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), VERSION_TIMEOUT)
+    cache.set_many(
+        {_modified_key(namespace): time.time() for namespace in namespaces},
+        VERSION_TIMEOUT,
+    )
+
+
+def bump_on_commit(*namespaces):
+    """`bump()` после фиксации текущей транзакции.
+
+    Иначе запрос, пришедший между сменой версии и фиксацией, положил бы
+    в кэш старые данные под новой версией.
+    """
+    transaction.on_commit(lambda: bump(*namespaces))
+
+
+def _validators(request, namespaces_for, args, kwargs):
+    # etag_func и last_modified_func вызываются по очереди для одного
+    # запроса, поэтому валидаторы считаются один раз.
+    if not hasattr(request, '_page_validators'):
+        request._page_validators = (None, None)
+        namespaces = namespaces_for(request, *args, **kwargs)
+        if namespaces:
+            request._page_validators = (
+                _etag(request, namespaces), _last_modified(namespaces)
+            )
+    return request._page_validators
+
+
+def _etag(request, namespaces):
+    user = request.user.pk if request.user.is_authenticated else 'anon'
+    params = '&'.join(
+        f'{name}={request.GET[name]}'
+        for name in PAGE_PARAMS if name in request.GET
+    )
+    versions = ','.join(map(str, get_versions(namespaces)))
+    source = replicas.cache_tag()
+    raw = f'{request.path}?{params}:{user}:{versions}:{source}'.encode()
+    return hashlib.md5(raw).hexdigest()
+
+
+def _last_modified(namespaces):
+    keys = [_modified_key(namespace) for namespace in namespaces]
+    stamps = cache.get_many(keys)
+    if len(stamps) < len(keys):
+        # Время изменения неизвестно (ключ вытеснен): считаем, что
+        # страница изменилась сейчас, так старая копия не оживёт.
+        now = time.time()
+        for key in set(keys) - set(stamps):
+            cache.add(key, now, VERSION_TIMEOUT)
+        stamps.update(cache.get_many(keys))
+    if not stamps:
+        return None
+    return datetime.fromtimestamp(int(max(stamps.values())), timezone.utc)
+
+
+def conditional_page(namespaces_for):
+    """Декоратор условного GET для страницы с версионными данными.
+
+    `namespaces_for(request, *args, **kwargs)` возвращает пространства
+    имён, от которых зависит страница, или None, если валидаторов нет.
+    Ответ 304 отдаётся до запросов к БД и рендеринга шаблона.
+    Last-Modified выставляется только анонимам: страница зависит от
+    пользователя, а по одной дате браузер после входа не отличит её.
+    """
+    def etag(request, *args, **kwargs):
+        return _validators(request, namespaces_for, args, kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        return _validators(request, namespaces_for, args, kwargs)[1]
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def _count(kind, outcome):
+    key = f'page_cache:{kind}:{outcome}'
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def cache_stats():
+    """Счётчики попаданий и промахов кэша страниц по видам страниц."""
+    keys = {
+        f'page_cache:{kind}:{outcome}': (kind, outcome)
+        for kind in STATS_KINDS
+        for outcome in ('hits', 'misses')
+    }
+    values = cache.get_many(list(keys))
+    stats = {kind: {'hits': 0, 'misses': 0} for kind in STATS_KINDS}
+    for key, (kind, outcome) in keys.items():
+        stats[kind][outcome] = values.get(key, 0)
+    return stats
+
+
+def page_key(request, namespace):
+    user = request.user.pk if request.user.is_authenticated else 'anon'
+    params = '&'.join(
+        f'{name}={request.GET[name]}'
+        for name in PAGE_PARAMS if name in request.GET
+    )
+    source = replicas.cache_tag()
+    raw = f'{request.path}?{params}:{user}:{source}'.encode()
+    return 'page:{}:{}:{}'.format(
+        namespace, get_version(namespace), hashlib.md5(raw).hexdigest()
+    )
+
+
+def fragment_key(request, namespace):
+    """Ключ куска страницы, общего для всех пользователей."""
+    params = '&'.join(
+        f'{name}={request.GET[name]}'
+        for name in PAGE_PARAMS if name in request.GET
+    )
+    raw = f'{request.path}?{params}:{replicas.cache_tag()}'.encode()
+    return 'fragment:{}:{}:{}'.format(
+        namespace, get_version(namespace), hashlib.md5(raw).hexdigest()
+    )
+
+
+def cached_fragment(request, namespace, render_fragment, *args):
+    """Отрендеренный HTML куска страницы из кэша или заново."""
+    html, _ = fetch(
+        fragment_key(request, namespace),
+        lambda: render_fragment(request, *args),
+        PAGE_CACHE_TIMEOUT,
+    )
+    return html
+
+
+def cached_page(request, namespace, render_page, *args):
+    """Отдаёт страницу из кэша или рендерит её и сохраняет.
+
+    Пересчёт защищён от одновременных промахов (`core.cache.fetch`).
+    Ответ помечается заголовком `X-Cache: HIT` или `X-Cache: MISS`.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return render_page(request, *args)
+    kind = namespace.split(':', 1)[0]
+    response, hit = fetch(
+        page_key(request, namespace),
+        lambda: render_page(request, *args),
+        PAGE_CACHE_TIMEOUT,
+        cacheable=lambda response: response.status_code == 200,
+    )
+    outcome = 'hit' if hit else 'miss'
+    _count(kind, 'hits' if hit else 'misses')
+    profiling.record_cache(hit=hit)
+    metrics.inc('yatube_page_cache_requests_total', kind=kind, outcome=outcome)
+    response['X-Cache'] = outcome.upper()
+    return response
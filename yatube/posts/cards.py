@@ -0,0 +1,61 @@
+"""Кэш отрендеренных карточек постов для лент.
+
+Карточка (`posts/includes/post_card.html`) одинакова для всех читателей,
+поэтому её HTML хранится в кэше под ключом из id поста и его версии
+`Post.version`. Лента достаёт карточки своей страницы одним
+`get_many` и рендерит только недостающие. Версия растёт при каждом
+изменении того, что видно в карточке: правке поста, новой миниатюре,
+комментарии, смене имени автора, адреса группы или её удалении. Так
+правка одного поста сбрасывает только его карточку; страницы с ним
+пересчитываются, но остальные карточки берутся из кэша.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import cache as pages
+from .models import Post
+
+CARD_TIMEOUT = getattr(settings, 'POSTS_CARD_CACHE_TIMEOUT', 60 * 60 * 24)
+TEMPLATE = 'posts/includes/post_card.html'
+
+
+def card_key(post, show_group=True):
+    return f'post_card:{post.pk}:{post.version}:{int(show_group)}'
+
+
+def attach(posts, show_group=True):
+    """Кладёт в `post.card` HTML карточки каждого поста из списка."""
+    keys = {card_key(post, show_group): post for post in posts}
+    found = cache.get_many(list(keys))
+    rendered = {}
+    for key, post in keys.items():
+        html = found.get(key)
+        if html is None:
+            html = rendered[key] = render_to_string(
+                TEMPLATE, {'post': post, 'show_group': show_group}
+            )
+        post.card = mark_safe(html)
+    if rendered:
+        cache.set_many(rendered, CARD_TIMEOUT)
+    return posts
+
+
+def touch(**filters):
+    """Увеличивает версию постов, карточки которых устарели.
+
+    UPDATE не отправляет сигналов, поэтому здесь же меняются версии
+    страниц, показывающих эти карточки: главной, групп и профилей.
+    """
+    posts = Post.objects.filter(**filters)
+    shown = set(posts.values_list('author_id', 'group_id').distinct())
+    updated = posts.update(version=F('version') + 1)
+    if updated:
+        pages.bump(
+            'index',
+            *{f'author:{author_id}' for author_id, _ in shown},
+            *{f'group:{group_id}' for _, group_id in shown if group_id},
+        )
+    return updated
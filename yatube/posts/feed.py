@@ -0,0 +1,141 @@
+"""Лента подписок с раздачей постов при записи (fan-out-on-write).
+
+Новый пост сразу раскладывается в `FeedEntry` подписчиков автора, и
+страница ленты читается одним диапазонным сканом по индексу
+`(user, pub_date)`. У авторов с огромным числом подписчиков раздача
+при записи слишком дорогая, поэтому их посты подтягиваются в ленту
+читателя при её открытии (fan-out-on-read).
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Q
+
+from .models import FeedEntry, Follow, Post, UserStats
+
+CELEBRITY_FOLLOWERS = getattr(settings, 'FEED_CELEBRITY_FOLLOWERS', 1000)
+BACKFILL_SIZE = getattr(settings, 'FEED_BACKFILL_SIZE', 200)
+BATCH_SIZE = 1000
+CELEBRITIES_KEY = 'feed:celebrities'
+CELEBRITIES_TIMEOUT = 60 * 5
+
+
+def celebrity_ids():
+    """Авторы, чьи посты раздаются при чтении, а не при записи."""
+    ids = cache.get(CELEBRITIES_KEY)
+    if ids is None:
+        ids = set(UserStats.objects.filter(
+            followers__gte=CELEBRITY_FOLLOWERS
+        ).values_list('user_id', flat=True))
+        cache.set(CELEBRITIES_KEY, ids, CELEBRITIES_TIMEOUT)
+    return ids
+
+
+def _store(rows):
+    """Сохраняет записи ленты пачками, пропуская уже существующие."""
+    batch = []
+    for user_id, post_id, author_id, pub_date in rows:
+        batch.append(FeedEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(post):
+    """Раскладывает новый пост в ленты подписчиков автора."""
+    if post.author_id in celebrity_ids():
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _store(
+        (user_id, post.pk, post.author_id, post.pub_date)
+        for user_id in followers.iterator()
+    )
+
+
+def fan_out_many(posts):
+    """Раскладывает пачку постов `(id, author_id, pub_date)` за раз."""
+    celebrities = celebrity_ids()
+    posts = [post for post in posts if post[1] not in celebrities]
+    followers = defaultdict(list)
+    rows = Follow.objects.filter(
+        author_id__in={author_id for _, author_id, _ in posts}
+    ).values_list('author_id', 'user_id')
+    for author_id, user_id in rows.iterator():
+        followers[author_id].append(user_id)
+    _store(
+        (user_id, post_id, author_id, pub_date)
+        for post_id, author_id, pub_date in posts
+        for user_id in followers[author_id]
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние посты автора после подписки."""
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'id', 'pub_date'
+    )[:BACKFILL_SIZE]
+    _store(
+        (user_id, post_id, author_id, pub_date)
+        for post_id, pub_date in posts
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def pull_celebrity_posts(user_id):
+    """Подтягивает в ленту свежие посты популярных авторов."""
+    celebrities = celebrity_ids()
+    if not celebrities:
+        return
+    authors = list(Follow.objects.filter(
+        user_id=user_id, author_id__in=celebrities
+    ).values_list('author_id', flat=True))
+    if not authors:
+        return
+    latest = dict(
+        FeedEntry.objects.filter(user_id=user_id, author_id__in=authors)
+        .values_list('author_id')
+        .annotate(Max('pub_date'))
+    )
+    condition = Q()
+    for author_id in authors:
+        fresh = Q(author_id=author_id)
+        if author_id in latest:
+            fresh &= Q(pub_date__gt=latest[author_id])
+        condition |= fresh
+    posts = Post.objects.filter(condition).values_list(
+        'id', 'author_id', 'pub_date'
+    )[:BACKFILL_SIZE]
+    _store(
+        (user_id, post_id, author_id, pub_date)
+        for post_id, author_id, pub_date in posts
+    )
+
+
+def user_feed(user):
+    """Записи ленты пользователя для постраничного чтения."""
+    pull_celebrity_posts(user.pk)
+    return FeedEntry.objects.filter(user=user).only('post_id', 'pub_date')
+
+
+def posts_for(entries):
+    """Подгружает посты для страницы записей ленты одним запросом."""
+    posts = Post.objects.for_listing().in_bulk(
+        [entry.post_id for entry in entries]
+    )
+    return [
+        posts[entry.post_id] for entry in entries if entry.post_id in posts
+    ]
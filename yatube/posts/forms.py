@@ -1,6 +1,9 @@
+import re
+
 from django import forms
 from django.contrib.auth import get_user_model
 
+from .follows import MAX_BULK_FOLLOW
 from .models import Post, Comment
 
 User = get_user_model()
@@ -29,3 +32,21 @@ class CommentForm(forms.ModelForm):
         help_texts = {
             'text': 'Разместите здесь текст.',
         }
+
+
+class FollowManyForm(forms.Form):
+    authors = forms.CharField(
+        label='Авторы',
+        help_text='Имена пользователей через пробел или запятую.',
+        widget=forms.Textarea,
+    )
+
+    def clean_authors(self):
+        usernames = list(dict.fromkeys(
+            re.split(r'[\s,]+', self.cleaned_data['authors'].strip())
+        ))
+        if len(usernames) > MAX_BULK_FOLLOW:
+            raise forms.ValidationError(
+                f'Не больше {MAX_BULK_FOLLOW} авторов за раз.'
+            )
+        return usernames
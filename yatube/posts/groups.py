@@ -0,0 +1,70 @@
+"""Кэш групп и счётчик постов в группе.
+
+Страница группы ищет её по `slug`. Кэш хранит отображение
+`slug -> id`, которое меняется редко, и сам объект группы по id.
+Объект сбрасывается при сохранении группы и при изменении счётчика
+`Group.posts_count`, который сигналы постов меняют атомарными
+`F()`-обновлениями. Так страница группы в установившемся режиме не
+обращается к БД.
+"""
+from django.core.cache import cache
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.http import Http404
+
+from .models import Group, Post
+
+TIMEOUT = 60 * 60
+
+
+def _slug_key(slug):
+    return f'group_slug:{slug}'
+
+
+def _group_key(group_id):
+    return f'group_obj:{group_id}'
+
+
+def get_group_or_404(slug):
+    group_id = cache.get(_slug_key(slug))
+    group = cache.get(_group_key(group_id)) if group_id else None
+    if group is not None:
+        return group
+    group = Group.objects.filter(slug=slug).first()
+    if group is None:
+        raise Http404(f'Группа {slug} не найдена')
+    cache.set_many({
+        _slug_key(slug): group.pk,
+        _group_key(group.pk): group,
+    }, TIMEOUT)
+    return group
+
+
+def forget(group_id, *slugs):
+    cache.delete_many(
+        [_group_key(group_id)] + [_slug_key(slug) for slug in slugs]
+    )
+
+
+def increment(group_id, delta):
+    """Меняет счётчик постов группы и сбрасывает её из кэша."""
+    if group_id is None:
+        return
+    Group.objects.filter(pk=group_id).update(
+        posts_count=Greatest(F('posts_count') + delta, 0)
+    )
+    forget(group_id)
+
+
+def recount():
+    """Пересчитывает счётчики постов всех групп по таблице постов."""
+    counts = Post.objects.filter(
+        group=OuterRef('pk')
+    ).order_by().values('group').annotate(count=Count('pk')).values('count')
+    updated = Group.objects.update(posts_count=Coalesce(
+        Subquery(counts, output_field=IntegerField()), 0
+    ))
+    cache.delete_many([
+        _group_key(pk) for pk in Group.objects.values_list('pk', flat=True)
+    ])
+    return updated
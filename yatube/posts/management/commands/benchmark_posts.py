@@ -0,0 +1,92 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings, setup_test_environment, teardown_test_environment
+)
+
+from posts import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет отдельную тестовую базу данными и замеряет страницы '
+        'с постами; с --baseline падает при регрессии.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in benchmarks.DEFAULT_VOLUMES.items():
+            parser.add_argument(f'--{name}', type=int, default=default)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз запрашивать каждую страницу.',
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом.',
+        )
+        parser.add_argument(
+            '--parallel', action='store_true',
+            help='Включить POSTS_PARALLEL_FETCH на время замера.',
+        )
+        parser.add_argument(
+            '--baseline', help='JSON с базовым замером для сравнения.',
+        )
+        parser.add_argument(
+            '--save-baseline', help='Куда записать результат как базовый.',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост времени ответа, доля.',
+        )
+
+    def handle(self, *args, **options):
+        volumes = {
+            name: options[name] for name in benchmarks.DEFAULT_VOLUMES
+        }
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            benchmarks.generate(seed=options['seed'], **volumes)
+            with override_settings(POSTS_PARALLEL_FETCH=options['parallel']):
+                results = benchmarks.run(
+                    repeat=options['repeat'], cold=options['cold']
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        self.report(results)
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+        if options['baseline']:
+            self.check_baseline(results, options)
+
+    def report(self, results):
+        self.stdout.write(f'{"страница":<18}{"p50, мс":>10}'
+                          f'{"p95, мс":>10}{"запросов":>10}{"байт":>10}')
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<18}{result["p50_ms"]:>10}'
+                f'{result["p95_ms"]:>10}{result["queries"]:>10}'
+                f'{result.get("bytes", ""):>10}'
+            )
+
+    def check_baseline(self, results, options):
+        try:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        regressions = benchmarks.compare(
+            results, baseline, tolerance=options['tolerance']
+        )
+        if regressions:
+            raise CommandError(
+                'Регрессия производительности:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
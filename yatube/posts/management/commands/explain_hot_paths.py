@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+
+from posts import benchmarks, query_plans
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает планы SQL-запросов основных страниц и отмечает '
+        'полные просмотры таблиц.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sample-data', action='store_true',
+            help='Проверять на отдельной тестовой базе с данными '
+                 'генератора benchmark_posts, а не на текущей.',
+        )
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Завершаться с ошибкой, если найдены проблемы.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['sample_data']:
+            problems = self.audit()
+        else:
+            setup_test_environment()
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True
+            )
+            try:
+                benchmarks.generate()
+                problems = self.audit()
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+        if problems and options['strict']:
+            raise CommandError(f'Проблемных запросов: {problems}')
+        self.stdout.write(f'Проблемных запросов: {problems}')
+
+    def audit(self):
+        if not Post.objects.filter(group__isnull=False).exists():
+            raise CommandError('В базе нет постов в группах.')
+        problems = 0
+        for name, url, user in benchmarks.scenarios():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name}: {url}'))
+            for sql, params in query_plans.capture(url, user):
+                plan, warnings = query_plans.explain(sql, params)
+                style = self.style.WARNING if warnings else str
+                self.stdout.write(style(f'  {sql}'))
+                for line in plan:
+                    self.stdout.write(f'    {line}')
+                for warning in warnings:
+                    self.stdout.write(self.style.ERROR(f'    ! {warning}'))
+                problems += bool(warnings)
+        return problems
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = 'Выгружает все посты в NDJSON или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Куда писать; по умолчанию — стандартный вывод.',
+        )
+        parser.add_argument(
+            '--format', choices=transfer.FORMATS, default='ndjson',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из БД за раз.',
+        )
+
+    def handle(self, *args, **options):
+        rows = transfer.export_rows(chunk_size=options['chunk_size'])
+        started = time.monotonic()
+        try:
+            if options['path'] == '-':
+                written = transfer.write_rows(
+                    self.stdout, rows, options['format']
+                )
+            else:
+                with open(
+                    options['path'], 'w', encoding='utf-8', newline=''
+                ) as f:
+                    written = transfer.write_rows(f, rows, options['format'])
+        except OSError as error:
+            raise CommandError(error)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено постов: {written}, {written / elapsed:.0f} строк/с'
+        ))
@@ -0,0 +1,51 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import follows, transfer
+
+
+class Command(BaseCommand):
+    help = 'Загружает подписки (user, author) из файла NDJSON или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл с подписками; «-» — стандартный ввод.'
+        )
+        parser.add_argument(
+            '--format', choices=transfer.FORMATS, default='ndjson',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько подписок создавать за раз.',
+        )
+        parser.add_argument(
+            '--no-backfill', action='store_true',
+            help='Не заполнять ленты старыми постами авторов.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            if options['path'] == '-':
+                created, errors = self.load(sys.stdin, options)
+            else:
+                with open(options['path'], encoding='utf-8', newline='') as f:
+                    created, errors = self.load(f, options)
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        for number, message in errors:
+            self.stderr.write(f'Строка {number}: {message}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Новых подписок: {created}, ошибок: {len(errors)}, '
+            f'{created / elapsed:.0f} строк/с'
+        ))
+
+    def load(self, stream, options):
+        return follows.import_follows(
+            transfer.read_rows(stream, options['format']),
+            batch_size=options['batch_size'],
+            backfill=not options['no_backfill'],
+        )
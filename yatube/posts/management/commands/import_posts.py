@@ -0,0 +1,45 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = 'Загружает посты из файла NDJSON или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл с постами; «-» — стандартный ввод.'
+        )
+        parser.add_argument(
+            '--format', choices=transfer.FORMATS, default='ndjson',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов создавать одной транзакцией.',
+        )
+
+    def handle(self, *args, **options):
+        importer = transfer.Importer(batch_size=options['batch_size'])
+        started = time.monotonic()
+        try:
+            if options['path'] == '-':
+                self.load(importer, sys.stdin, options['format'])
+            else:
+                with open(options['path'], encoding='utf-8', newline='') as f:
+                    self.load(importer, f, options['format'])
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        for number, message in importer.errors:
+            self.stderr.write(f'Строка {number}: {message}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {importer.created}, '
+            f'пропущено: {len(importer.errors)}, '
+            f'{importer.created / elapsed:.0f} строк/с'
+        ))
+
+    def load(self, importer, stream, file_format):
+        importer.run(transfer.read_rows(stream, file_format))
@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+
+from core.profiling import profile_templates
+from posts import benchmarks
+from posts.models import Post
+from posts.query_plans import NO_CACHE
+
+
+class Command(BaseCommand):
+    help = (
+        'Повторяет запросы к основным страницам и показывает число '
+        'рендеров и время каждого шаблона и include.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sample-data', action='store_true',
+            help='Замерять на отдельной тестовой базе с данными '
+                 'генератора benchmark_posts, а не на текущей.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Сколько раз запрашивать каждую страницу.',
+        )
+        parser.add_argument(
+            '--warm-cache', action='store_true',
+            help='Не отключать кэш: замерять то, что рендерится '
+                 'при попаданиях в кэш страниц и карточек.',
+        )
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help='Сколько самых дорогих шаблонов показать.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['sample_data']:
+            profile = self.replay(options)
+        else:
+            setup_test_environment()
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True
+            )
+            try:
+                benchmarks.generate()
+                profile = self.replay(options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+        self.report(profile, options['limit'])
+
+    def replay(self, options):
+        if not Post.objects.filter(group__isnull=False).exists():
+            raise CommandError('В базе нет постов в группах.')
+        caches = {} if options['warm_cache'] else {'CACHES': NO_CACHE}
+        with override_settings(**caches), profile_templates() as profile:
+            for name, url, user in benchmarks.scenarios():
+                if name.startswith('api_'):
+                    continue
+                client = Client()
+                if user is not None:
+                    client.force_login(user)
+                for _ in range(options['repeat']):
+                    client.get(url)
+        return profile
+
+    def report(self, profile, limit):
+        self.stdout.write(f'{"шаблон":<40}{"рендеров":>10}'
+                          f'{"всего, мс":>12}{"свои, мс":>12}')
+        for name, count, total_ms, own_ms in profile.rows()[:limit]:
+            self.stdout.write(
+                f'{name:<40}{count:>10}{total_ms:>12.2f}{own_ms:>12.2f}'
+            )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts import groups, stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики постов, комментариев и подписок '
+        'пользователей и счётчики постов групп.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько пользователей сверять за один проход.',
+        )
+
+    def handle(self, *args, **options):
+        fixed = stats.reconcile(batch_size=options['batch_size'])
+        recounted = groups.recount()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Исправлено счётчиков: {fixed}, групп пересчитано: '
+                f'{recounted}'
+            )
+        )
@@ -0,0 +1,128 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core import metrics
+from posts import thumbnails
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY = 60
+
+
+def _generate(post_id):
+    """True или False, построена ли миниатюра; None при ошибке."""
+    try:
+        built = thumbnails.generate(post_id)
+    except Exception:
+        logger.exception('Не удалось построить миниатюру поста %s', post_id)
+        metrics.inc('yatube_thumbnails_total', result='failed')
+        return None
+    metrics.inc(
+        'yatube_thumbnails_total',
+        result='generated' if built else 'skipped',
+    )
+    return built
+
+
+def _generate_closing(post_id):
+    try:
+        return _generate(post_id)
+    finally:
+        connection.close()
+
+
+class Failures:
+    """Посты, чьи картинки не удалось обработать, и когда их повторить.
+
+    Пауза растёт вдвое с каждой попыткой; после `max_attempts` попыток
+    пост больше не берётся до перезапуска рабочего процесса.
+    """
+
+    def __init__(self, max_attempts):
+        self.max_attempts = max_attempts
+        self.attempts = {}
+        self.retry_at = {}
+
+    def waiting(self):
+        now = time.monotonic()
+        return [pk for pk, at in self.retry_at.items() if at > now]
+
+    def record(self, post_id):
+        attempts = self.attempts[post_id] = self.attempts.get(post_id, 0) + 1
+        if attempts >= self.max_attempts:
+            self.retry_at[post_id] = float('inf')
+            logger.error(
+                'Миниатюра поста %s не построена за %s попыток, пост пропущен',
+                post_id, attempts,
+            )
+            return
+        self.retry_at[post_id] = (
+            time.monotonic() + RETRY_DELAY * 2 ** (attempts - 1)
+        )
+
+    def forget(self, post_id):
+        self.attempts.pop(post_id, None)
+        self.retry_at.pop(post_id, None)
+
+
+class Command(BaseCommand):
+    help = 'Строит миниатюры картинок новых постов в пуле потоков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Число потоков, строящих миниатюры; 0 — текущий поток.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help='Сколько постов забирать из очереди за раз.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Обработать текущую очередь и завершиться.',
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='Сколько раз пробовать картинку, которая не обработалась.',
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] > 0:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                built = self.work(pool.map, _generate_closing, options)
+        else:
+            built = self.work(map, _generate, options)
+        self.stdout.write(self.style.SUCCESS(f'Построено миниатюр: {built}'))
+
+    def work(self, run_all, generate, options):
+        failures = Failures(options['max_attempts'])
+        built = 0
+        cursor = 0
+        while True:
+            batch = list(
+                thumbnails.pending().filter(pk__gt=cursor).exclude(
+                    pk__in=failures.waiting()
+                ).values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not batch:
+                if options['once']:
+                    return built
+                cursor = 0
+                time.sleep(options['interval'])
+                continue
+            cursor = batch[-1]
+            for post_id, result in zip(batch, run_all(generate, batch)):
+                if result is None:
+                    failures.record(post_id)
+                else:
+                    failures.forget(post_id)
+                    built += result
+            metrics.flush()
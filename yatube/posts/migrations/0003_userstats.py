@@ -0,0 +1,58 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:47
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def count_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    sources = {
+        'posts': (Post, 'author'),
+        'comments': (Comment, 'author'),
+        'followers': (Follow, 'author'),
+        'following': (Follow, 'user'),
+    }
+    counts = {
+        counter: dict(
+            model.objects.order_by().values_list(field).annotate(Count('pk'))
+        )
+        for counter, (model, field) in sources.items()
+    }
+    UserStats.objects.bulk_create(
+        [
+            UserStats(user_id=pk, **{
+                counter: values.get(pk, 0)
+                for counter, values in counts.items()
+            })
+            for pk in User.objects.values_list('pk', flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0002_feedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('posts', models.PositiveIntegerField(default=0)),
+                ('comments', models.PositiveIntegerField(default=0)),
+                ('followers', models.PositiveIntegerField(db_index=True, default=0)),
+                ('following', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:02
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    duplicates = Follow.objects.order_by().values(
+        'user_id', 'author_id'
+    ).annotate(first=Min('pk'), total=Count('pk')).filter(total__gt=1)
+    followers, following = Counter(), Counter()
+    for row in list(duplicates):
+        Follow.objects.filter(
+            user_id=row['user_id'], author_id=row['author_id']
+        ).exclude(pk=row['first']).delete()
+        followers[row['author_id']] += row['total'] - 1
+        following[row['user_id']] += row['total'] - 1
+    for field, counts in (('followers', followers),
+                          ('following', following)):
+        for user_id, extra in counts.items():
+            UserStats.objects.filter(
+                user_id=user_id, **{f'{field}__gte': extra}
+            ).update(**{field: F(field) - extra})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_comment_post_created_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='postimagevariant',
+            options={},
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='post_group_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='post_author_pub_date_idx'),
+        ),
+        migrations.RunPython(
+            remove_duplicate_follows, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_follow'),
+        ),
+    ]
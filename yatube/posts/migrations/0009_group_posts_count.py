@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:08
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_group_posts(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    counts = Group.objects.annotate(total=Count('posts')).values_list(
+        'pk', 'total'
+    )
+    for pk, total in counts.iterator():
+        if total:
+            Group.objects.filter(pk=pk).update(posts_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_group_posts, migrations.RunPython.noop),
+    ]
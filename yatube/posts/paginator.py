@@ -0,0 +1,165 @@
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+FORWARD = 'n'
+BACKWARD = 'p'
+APPROXIMATE_COUNT_TIMEOUT = 60
+
+
+def encode_cursor(*values):
+    """Упаковывает значения ключа в непрозрачный токен для `?cursor=`."""
+    raw = json.dumps(values, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен курсора, для битого токена возвращает None."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw.decode())
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list):
+        return None
+    return values
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинация по полям сортировки вместо OFFSET.
+
+    Страница выбирается условием `(pub_date, id) < (значения курсора)`,
+    поэтому глубокие страницы стоят столько же, сколько первая, и
+    используют индекс по `pub_date`. Обычный `?page=` продолжает
+    работать через OFFSET, чтобы старые ссылки не ломались.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-id'),
+                 approximate_count=False, **kwargs):
+        self.ordering = tuple(ordering)
+        self.descending = self.ordering[0].startswith('-')
+        self.fields = tuple(name.lstrip('-') for name in self.ordering)
+        self.approximate_count = approximate_count
+        super().__init__(
+            object_list.order_by(*self.ordering), per_page, **kwargs
+        )
+
+    @cached_property
+    def count(self):
+        """Число объектов; в приближённом режиме берётся из кэша."""
+        if not self.approximate_count:
+            return self.object_list.count()
+        query = str(self.object_list.query).encode()
+        key = 'paginator_count:' + hashlib.md5(query).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, APPROXIMATE_COUNT_TIMEOUT)
+        return count
+
+    def _key(self, obj):
+        if isinstance(obj, dict):
+            values = [obj[field] for field in self.fields]
+        else:
+            values = [getattr(obj, field) for field in self.fields]
+        return [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in values
+        ]
+
+    def _parse_key(self, values):
+        if len(values) != len(self.fields):
+            return None
+        meta = self.object_list.model._meta
+        try:
+            return [
+                meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            return None
+
+    def _after(self, values, forward):
+        """Условие «строго после курсора» в заданном направлении."""
+        lookup = 'lt' if forward == self.descending else 'gt'
+        condition = Q()
+        for index, field in enumerate(self.fields):
+            step = Q(**{f'{field}__{lookup}': values[index]})
+            for previous, value in zip(self.fields[:index], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def _reversed_ordering(self):
+        return [
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        ]
+
+    def cursor_page(self, cursor=None):
+        """Возвращает страницу, следующую за курсором (или первую)."""
+        token = decode_cursor(cursor)
+        direction, values = FORWARD, None
+        if token and token[0] in (FORWARD, BACKWARD):
+            direction = token[0]
+            values = self._parse_key(token[1:]) if token[1:] else None
+        forward = direction == FORWARD
+        queryset = self.object_list
+        if not forward:
+            queryset = queryset.order_by(*self._reversed_ordering())
+        if values is not None:
+            queryset = queryset.filter(self._after(values, forward))
+        objects = list(queryset[:self.per_page + 1])
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if not forward:
+            objects.reverse()
+        if forward:
+            has_next, has_previous = has_more, values is not None
+        else:
+            has_next, has_previous = values is not None, has_more
+        return self._cursor_page(
+            objects, has_next, has_previous,
+            number=None if has_previous else 1,
+        )
+
+    def _cursor_page(self, objects, has_next, has_previous, number=None):
+        page = Page(objects, number, self)
+        page.next_cursor = None
+        page.previous_cursor = None
+        page.last_cursor = encode_cursor(BACKWARD)
+        if objects and has_next:
+            page.next_cursor = encode_cursor(
+                FORWARD, *self._key(objects[-1])
+            )
+        if objects and has_previous:
+            page.previous_cursor = encode_cursor(
+                BACKWARD, *self._key(objects[0])
+            )
+        return page
+
+    def get_page(self, number):
+        """Нумерованная страница (OFFSET) с курсорами для навигации."""
+        page = super().get_page(number)
+        return self._cursor_page(
+            list(page.object_list),
+            page.has_next(),
+            page.has_previous(),
+            page.number,
+        )
+
+    def page_from_request(self, request):
+        """Страница по `?cursor=`, а при его отсутствии — по `?page=`."""
+        cursor = request.GET.get('cursor')
+        page_number = request.GET.get('page')
+        if cursor or not page_number:
+            return self.cursor_page(cursor)
+        return self.get_page(page_number)
@@ -0,0 +1,75 @@
+"""Одновременная выборка независимых данных страницы.
+
+Асинхронных представлений в Django 2.2 нет, поэтому независимые
+запросы одной страницы (например, страница постов и проверка подписки
+в профиле) можно выполнить в пуле потоков: каждый поток работает со
+своим соединением с БД. Включается настройкой `POSTS_PARALLEL_FETCH`;
+по умолчанию выключено, и `gather()` просто вызывает функции по очереди.
+
+Поток пула получает состояние запроса из thread-local: профиль запроса
+(`core.profiling`), который считает и его SQL, и разрешение читать с
+реплики (`core.replicas`). `CaptureQueriesContext` запросы пула
+по-прежнему не видит: он следит только за соединением основного потока.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from core import profiling, replicas
+
+_executor = None
+_lock = threading.Lock()
+
+
+def enabled():
+    return getattr(settings, 'POSTS_PARALLEL_FETCH', False)
+
+
+def _pool():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'POSTS_PARALLEL_WORKERS', 4),
+                thread_name_prefix='posts-fetch',
+            )
+        return _executor
+
+
+def _run(call, profile, replica):
+    # Соединения потоков пула живут дольше запроса, поэтому за их
+    # возрастом и состоянием следим так же, как обработчик запросов.
+    close_old_connections()
+    profiling.attach(profile)
+    replicas.use_replica(replica)
+    try:
+        with ExitStack() as stack:
+            if profile is not None:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.execute)
+                    )
+            return call()
+    finally:
+        profiling.stop()
+        replicas.use_replica(False)
+        close_old_connections()
+
+
+def gather(*calls):
+    """Результаты вызовов в том же порядке.
+
+    Первый вызов выполняется в текущем потоке, остальные — в пуле.
+    Исключение любого из вызовов пробрасывается дальше.
+    """
+    if not enabled() or len(calls) < 2:
+        return [call() for call in calls]
+    profile, replica = profiling.current(), replicas.reading_replica()
+    futures = [
+        _pool().submit(_run, call, profile, replica) for call in calls[1:]
+    ]
+    first = calls[0]()
+    return [first] + [future.result() for future in futures]
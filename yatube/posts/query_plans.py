@@ -0,0 +1,88 @@
+"""Планы выполнения запросов, которые делают страницы с постами.
+
+`capture()` запрашивает страницу тестовым клиентом и записывает все
+SQL-запросы с параметрами, `explain()` получает для каждого план
+(`EXPLAIN QUERY PLAN` на SQLite, `EXPLAIN` на остальных СУБД) и
+отмечает полные просмотры таблиц и сортировки во временных структурах.
+Запускается командой `manage.py explain_hot_paths`.
+"""
+import re
+
+from django.db import connection, transaction
+from django.test import Client, override_settings
+
+NO_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+SQLITE_WARNINGS = (
+    (re.compile(r'^SCAN (?!.*VIRTUAL TABLE)'), 'полный просмотр'),
+    (re.compile(r'USE TEMP B-TREE'), 'сортировка без индекса'),
+)
+# Обход индекса по порядку с LIMIT останавливается после нужных строк,
+# так читается, например, главная страница.
+ORDERED_WALK = re.compile(r'^SCAN \S+ USING (COVERING )?INDEX')
+LIMIT = re.compile(r'\bLIMIT\b')
+GENERIC_WARNINGS = (
+    (re.compile(r'Seq Scan'), 'полный просмотр'),
+    (re.compile(r'\bSort\b'), 'сортировка без индекса'),
+)
+
+
+class _Recorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def capture(url, user=None):
+    """SELECT-запросы страницы; всё, что она записала, откатывается.
+
+    Кэш на время запроса отключается, иначе страница может не сделать
+    ни одного запроса к БД.
+    """
+    client = Client()
+    recorder = _Recorder()
+    with transaction.atomic(), override_settings(CACHES=NO_CACHE):
+        if user is not None:
+            client.force_login(user)
+        with connection.execute_wrapper(recorder):
+            client.get(url)
+        transaction.set_rollback(True)
+    unique = {}
+    for sql, params in recorder.queries:
+        unique.setdefault(sql, params)
+    return list(unique.items())
+
+
+def _plan(sql, params):
+    prefix = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else (
+        'EXPLAIN'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}', params)
+        rows = cursor.fetchall()
+    if connection.vendor == 'sqlite':
+        return [row[-1] for row in rows]
+    return [' '.join(str(value) for value in row) for row in rows]
+
+
+def explain(sql, params):
+    """План запроса и список найденных в нём проблем."""
+    plan = _plan(sql, params)
+    patterns = (
+        SQLITE_WARNINGS if connection.vendor == 'sqlite'
+        else GENERIC_WARNINGS
+    )
+    limited = bool(LIMIT.search(sql))
+    warnings = [
+        f'{message}: {line}'
+        for line in plan
+        if not (limited and ORDERED_WALK.search(line))
+        for pattern, message in patterns
+        if pattern.search(line)
+    ]
+    return plan, warnings
@@ -0,0 +1,154 @@
+"""Полнотекстовый поиск по постам.
+
+На SQLite тексты постов лежат в виртуальной таблице FTS5, которую
+сигналы обновляют при сохранении и удалении поста; результаты
+упорядочены по bm25 и листаются курсором `(rank, rowid)`. На других
+СУБД поиск откатывается к `icontains` с сортировкой по дате.
+"""
+import re
+
+from django.core.paginator import Page
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+from .paginator import BACKWARD, FORWARD, CursorPaginator, decode_cursor
+from .paginator import encode_cursor
+
+FTS_TABLE = 'posts_post_fts'
+MARK_START, MARK_END = '\x02', '\x03'
+SNIPPET_TOKENS = 32
+MAX_TERMS = 10
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def index_post(post_id, text):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+            [post_id, text],
+        )
+
+
+def remove_post(post_id):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+
+def index_after(post_id=0):
+    """Переиндексирует посты с id больше заданного, возвращает их число.
+
+    Нужна для массовой загрузки, при которой сигналы не срабатывают.
+    """
+    if not is_supported():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid > %s', [post_id]
+        )
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) SELECT id, text '
+            'FROM posts_post WHERE id > %s', [post_id]
+        )
+        return cursor.rowcount
+
+
+def rebuild():
+    """Переиндексирует все посты, возвращает их число."""
+    return index_after(0)
+
+
+def terms(query):
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+def _highlight(text):
+    text = escape(text).replace(MARK_START, '<mark>')
+    return mark_safe(text.replace(MARK_END, '</mark>'))
+
+
+def _fts_rows(match, values, forward, limit):
+    """Строки (rowid, rank, snippet) после курсора в порядке выдачи."""
+    sql = (
+        f'SELECT rowid, rank, snippet({FTS_TABLE}, 0, %s, %s, %s, %s) '
+        f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+    )
+    params = [MARK_START, MARK_END, '…', SNIPPET_TOKENS, match]
+    if values is not None:
+        op = '>' if forward else '<'
+        sql += f' AND (rank {op} %s OR (rank = %s AND rowid {op} %s))'
+        params += [values[0], values[0], values[1]]
+    order = 'ASC' if forward else 'DESC'
+    sql += f' ORDER BY rank {order}, rowid {order} LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return rows if forward else rows[::-1]
+
+
+def _fts_page(words, cursor, per_page):
+    token = decode_cursor(cursor) or [FORWARD]
+    forward = token[0] != BACKWARD
+    values = token[1:3] if len(token) == 3 else None
+    if values and not all(isinstance(v, (int, float)) for v in values):
+        values = None
+    match = ' '.join(f'"{word}"' for word in words)
+    rows = _fts_rows(match, values, forward, per_page + 1)
+    has_more = len(rows) > per_page
+    rows = rows[1:] if has_more and not forward else rows[:per_page]
+    posts = Post.objects.for_listing().in_bulk([row[0] for row in rows])
+    results = []
+    for post_id, rank, snippet in rows:
+        if post_id in posts:
+            post = posts[post_id]
+            post.snippet = _highlight(snippet)
+            results.append(post)
+    page = Page(results, None, None)
+    has_next = has_more if forward else values is not None
+    has_previous = values is not None if forward else has_more
+    page.next_cursor = page.previous_cursor = page.last_cursor = None
+    if rows and has_next:
+        page.next_cursor = encode_cursor(FORWARD, rows[-1][1], rows[-1][0])
+    if rows and has_previous:
+        page.previous_cursor = encode_cursor(
+            BACKWARD, rows[0][1], rows[0][0]
+        )
+    return page
+
+
+def _mark(match):
+    return f'<mark>{match.group(0)}</mark>'
+
+
+def _fallback_page(words, cursor, per_page):
+    posts = Post.objects.for_listing()
+    for word in words:
+        posts = posts.filter(text__icontains=word)
+    page = CursorPaginator(posts, per_page).cursor_page(cursor)
+    pattern = re.compile(
+        '|'.join(re.escape(escape(word)) for word in words), re.IGNORECASE
+    )
+    for post in page:
+        post.snippet = mark_safe(pattern.sub(_mark, escape(post.text)))
+    page.last_cursor = None
+    return page
+
+
+def search(query, cursor=None, per_page=10):
+    """Страница найденных постов; у каждого поста есть `snippet`."""
+    words = terms(query)
+    if not words:
+        return None
+    if is_supported():
+        return _fts_page(words, cursor, per_page)
+    return _fallback_page(words, cursor, per_page)
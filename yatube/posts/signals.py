@@ -0,0 +1,208 @@
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from . import authors, cache, cards, groups, stats, tasks
+from .models import Comment, Follow, Group, Post, User
+
+NAME_FIELDS = {'first_name', 'last_name'}
+
+
+def _image_name(value):
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_init, sender=Post)
+def remember_initial_state(sender, instance, **kwargs):
+    instance._initial_group_id = instance.__dict__.get('group_id')
+    instance._initial_image = _image_name(instance.__dict__.get('image'))
+
+
+@receiver(pre_save, sender=Post)
+def reset_thumbnail(sender, instance, raw=False, **kwargs):
+    if not raw and _image_name(instance.image) != instance._initial_image:
+        instance.thumbnail = ''
+        instance.thumbnail_width = instance.thumbnail_height = None
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        tasks.fan_out_post.delay(instance.pk)
+        stats.increment(instance.author_id, posts=1)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    stats.increment(instance.author_id, posts=-1)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and (update_fields is None or 'text' in update_fields):
+        tasks.index_post.delay(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    tasks.unindex_post.delay(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        tasks.backfill_feed.delay(instance.user_id, instance.author_id)
+        stats.increment(instance.author_id, followers=1)
+        stats.increment(instance.user_id, following=1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    tasks.prune_feed.delay(instance.user_id, instance.author_id)
+    stats.increment(instance.author_id, followers=-1)
+    stats.increment(instance.user_id, following=-1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.increment(instance.author_id, comments=1)
+        cards.touch(pk=instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    stats.increment(instance.author_id, comments=-1)
+    cards.touch(pk=instance.post_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    group_ids = {instance.group_id, instance._initial_group_id} - {None}
+    cache.bump(
+        'index', f'post:{instance.pk}', f'author:{instance.author_id}',
+        *(f'group:{pk}' for pk in group_ids)
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    cache.bump('index', f'group:{instance.pk}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    group_id = Post.objects.filter(pk=instance.post_id).values_list(
+        'group_id', flat=True
+    ).first()
+    pages = [f'group:{group_id}'] if group_id else []
+    cache.bump('index', f'comments:{instance.post_id}', *pages)
+
+
+@receiver(pre_save, sender=Post)
+def increment_post_version(sender, instance, raw=False, update_fields=None,
+                           **kwargs):
+    # Версия растёт в самом UPDATE: значение, прочитанное вместе с
+    # постом, могло устареть из-за комментария или миниатюры, и его
+    # запись вернула бы строку к версии с уже закэшированной карточкой.
+    if raw or instance._state.adding:
+        return
+    if update_fields is None or 'version' in update_fields:
+        instance.version = F('version') + 1
+
+
+@receiver(post_save, sender=Post)
+def bump_post_version(sender, instance, created, raw=False,
+                      update_fields=None, **kwargs):
+    if created or raw:
+        return
+    if update_fields is not None and 'version' not in update_fields:
+        cards.touch(pk=instance.pk)
+    instance.refresh_from_db(fields=['version'])
+
+
+@receiver(post_save, sender=Post)
+def count_group_posts(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        groups.increment(instance.group_id, 1)
+    elif instance.group_id != instance._initial_group_id:
+        groups.increment(instance._initial_group_id, -1)
+        groups.increment(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_group_post(sender, instance, **kwargs):
+    groups.increment(instance.group_id, -1)
+
+
+@receiver(pre_save, sender=Group)
+def remember_slug(sender, instance, **kwargs):
+    instance._previous_slug = None
+    if instance.pk:
+        instance._previous_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def forget_group(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_slug', None)
+    groups.forget(instance.pk, *{instance.slug, previous} - {None})
+    if previous and previous != instance.slug:
+        cards.touch(group_id=instance.pk)
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_posts(sender, instance, **kwargs):
+    # После удаления у постов group_id уже NULL, и их не найти.
+    instance._post_ids = list(
+        instance.posts.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Group)
+def touch_ungrouped_cards(sender, instance, **kwargs):
+    post_ids = getattr(instance, '_post_ids', None)
+    if post_ids:
+        cards.touch(pk__in=post_ids)
+
+
+@receiver(post_save, sender=Post)
+def remember_saved_state(sender, instance, **kwargs):
+    instance._initial_group_id = instance.group_id
+    instance._initial_image = _image_name(instance.image)
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, update_fields=None, **kwargs):
+    instance._previous_username = None
+    if instance.pk and (update_fields is None or 'username' in update_fields):
+        instance._previous_username = User.objects.filter(
+            pk=instance.pk
+        ).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_author(sender, instance, update_fields=None, **kwargs):
+    previous = getattr(instance, '_previous_username', None)
+    authors.forget(*{instance.username, previous} - {None})
+    cache.bump(f'author:{instance.pk}')
+    if previous and previous != instance.username:
+        # Имя и ссылка на профиль есть в кэше комментариев к постам.
+        post_ids = Comment.objects.filter(author_id=instance.pk).values_list(
+            'post_id', flat=True
+        ).distinct()
+        cache.bump(*(f'comments:{post_id}' for post_id in post_ids))
+    if not kwargs.get('created') and (
+        update_fields is None or NAME_FIELDS & set(update_fields)
+    ):
+        cards.touch(author_id=instance.pk)
@@ -0,0 +1,114 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарными `F()`-обновлениями из сигналов, а
+`reconcile()` (команда `manage.py reconcile_stats`) пересчитывает их
+по таблицам и исправляет накопившееся расхождение. Любое изменение
+счётчиков меняет версию `author:<id>`, от которой зависит ETag профиля.
+"""
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from . import cache
+from .models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+COUNTERS = ('posts', 'comments', 'followers', 'following')
+SOURCES = {
+    'posts': (Post, 'author'),
+    'comments': (Comment, 'author'),
+    'followers': (Follow, 'author'),
+    'following': (Follow, 'user'),
+}
+
+
+def increment(user_id, **deltas):
+    """Атомарно меняет счётчики пользователя на заданные величины."""
+    _apply(user_id, deltas)
+    cache.bump_on_commit(f'author:{user_id}')
+
+
+def _apply(user_id, deltas):
+    updates = {
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    }
+    if UserStats.objects.filter(user_id=user_id).update(**updates):
+        return
+    if any(delta < 0 for delta in deltas.values()):
+        # Строки нет, а уменьшать нечего: пользователь удаляется
+        # каскадом или счётчики ещё не посчитаны.
+        return
+    stats, created = UserStats.objects.get_or_create(
+        user_id=user_id, defaults=deltas
+    )
+    if not created:
+        UserStats.objects.filter(user_id=user_id).update(**updates)
+
+
+def stats_for(user):
+    """Счётчики пользователя; для новых пользователей — нулевые."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return UserStats(user=user)
+
+
+def _actual(counter, outer='pk'):
+    model, field = SOURCES[counter]
+    counts = model.objects.filter(
+        **{field: OuterRef(outer)}
+    ).order_by().values(field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def recount(counter, user_ids):
+    """Записывает в счётчик `counter` пользователей точное значение.
+
+    В отличие от приростов результат не зависит от того, сколько
+    одновременных запросов изменили таблицу и вызвали пересчёт.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    UserStats.objects.filter(user_id__in=user_ids).update(
+        **{counter: _actual(counter, 'user_id')}
+    )
+    cache.bump_on_commit(*(f'author:{user_id}' for user_id in user_ids))
+
+
+def reconcile(batch_size=1000):
+    """Пересчитывает счётчики всех пользователей, возвращает число правок."""
+    rows = User.objects.order_by('pk').annotate(**{
+        f'actual_{counter}': _actual(counter) for counter in COUNTERS
+    }).values_list('pk', *(f'actual_{counter}' for counter in COUNTERS))
+    rows = rows.iterator(chunk_size=batch_size)
+    fixed = 0
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            return fixed
+        stored = UserStats.objects.in_bulk([row[0] for row in chunk])
+        created, updated = [], []
+        for pk, *counts in chunk:
+            actual = dict(zip(COUNTERS, counts))
+            stats = stored.get(pk)
+            if stats is None:
+                created.append(UserStats(user_id=pk, **actual))
+            elif any(getattr(stats, f) != v for f, v in actual.items()):
+                for field, value in actual.items():
+                    setattr(stats, field, value)
+                updated.append(stats)
+        UserStats.objects.bulk_create(created, ignore_conflicts=True)
+        UserStats.objects.bulk_update(updated, COUNTERS)
+        cache.bump_on_commit(*(
+            f'author:{stats.user_id}' for stats in created + updated
+        ))
+        fixed += len(created) + len(updated)
@@ -0,0 +1,48 @@
+"""Фоновые задания постов: раздача в ленты и поисковый индекс.
+
+Сигналы моделей только ставят задания в очередь (`core.tasks`), чтобы
+запись поста или подписки не ждала раздачи по всем подписчикам.
+Задания получают id и перечитывают состояние из базы: к моменту
+выполнения пост может быть изменён или удалён, а подписка — отменена.
+"""
+from core.tasks import task
+
+from . import feed, search
+from .models import Follow, Post
+
+
+@task
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        'author_id', 'pub_date'
+    ).first()
+    if post is not None:
+        feed.fan_out(post)
+
+
+@task
+def backfill_feed(user_id, author_id):
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        feed.backfill(user_id, author_id)
+
+
+@task
+def prune_feed(user_id, author_id):
+    if not Follow.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).exists():
+        feed.prune(user_id, author_id)
+
+
+@task
+def index_post(post_id):
+    text = Post.objects.filter(pk=post_id).values_list(
+        'text', flat=True
+    ).first()
+    if text is not None:
+        search.index_post(post_id, text)
+
+
+@task
+def unindex_post(post_id):
+    search.remove_post(post_id)
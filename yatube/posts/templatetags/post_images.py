@@ -0,0 +1,31 @@
+from collections import defaultdict
+
+from django import template
+
+register = template.Library()
+
+SIZES = '(max-width: 960px) 100vw, 960px'
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def post_picture(post):
+    """Картинка поста с `srcset` по ширинам и `<source>` по форматам."""
+    srcsets = defaultdict(list)
+    # Сортировка здесь, а не в ORDER BY: prefetch берёт варианты сразу
+    # многих постов, и SQLite пришлось бы сортировать их во временном
+    # B-дереве.
+    variants = sorted(post.variants.all(), key=lambda v: v.width)
+    for variant in variants:
+        srcsets[variant.mime_type].append(
+            f'{variant.image.url} {variant.width}w'
+        )
+    fallback = srcsets.pop('image/jpeg', [])
+    return {
+        'post': post,
+        'sources': [
+            {'type': mime_type, 'srcset': ', '.join(srcset)}
+            for mime_type, srcset in srcsets.items()
+        ],
+        'srcset': ', '.join(fallback),
+        'sizes': SIZES,
+    }
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import authors
+
+User = get_user_model()
+
+
+class AuthorCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(
+            username='posts_author', first_name='Лев', last_name='Толстой'
+        )
+
+    def setUp(self):
+        cache.clear()
+        authors.local.clear()
+
+    def test_profile_skips_users_table_when_warm(self):
+        """Профиль известного автора не обращается к таблице users."""
+        url = reverse('posts:profile', args=[self.author.username])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(url)
+        self.assertContains(response, 'Лев Толстой')
+        self.assertFalse(any(
+            'FROM "auth_user" WHERE "auth_user"."username"' in query['sql']
+            for query in queries
+        ))
+
+    def test_author_is_user_with_deferred_fields(self):
+        """Из кэша возвращается User, остальные поля подгружаются."""
+        author = authors.get_author(self.author.username)
+        self.assertEqual(author, self.author)
+        self.assertEqual(author.get_deferred_fields(), {
+            field.attname for field in User._meta.concrete_fields
+        } - set(authors.AUTHOR_FIELDS))
+        self.assertIsNone(authors.get_author('nobody'))
+
+    def test_rename_invalidates_both_names(self):
+        """Переименование сбрасывает старое и новое имя."""
+        authors.get_author(self.author.username)
+        self.author.username = 'renamed'
+        self.author.save()
+        self.assertIsNone(authors.get_author('posts_author'))
+        self.assertEqual(authors.get_author('renamed').pk, self.author.pk)
+
+    def test_lru_evicts_oldest_and_expires(self):
+        """Локальный кэш ограничен по размеру и по времени жизни."""
+        lru = authors.LRUCache(size=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')),
+                         (1, None, 3))
+        expired = authors.LRUCache(size=2, ttl=-1)
+        expired.set('a', 1)
+        self.assertIsNone(expired.get('a'))
@@ -0,0 +1,35 @@
+from django.test import TestCase
+
+from .. import benchmarks
+from ..models import FeedEntry, Post, UserStats
+
+
+class BenchmarksTest(TestCase):
+    def test_generate_and_run(self):
+        """Генератор наполняет базу, а замер проходит по всем страницам."""
+        benchmarks.generate(
+            users=5, groups=2, posts=30, comments=20, follows=8
+        )
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(
+            sum(UserStats.objects.values_list('posts', flat=True)), 30
+        )
+        self.assertTrue(FeedEntry.objects.exists())
+        results = benchmarks.run(repeat=2)
+        self.assertEqual(set(results), {
+            'index', 'group_posts', 'profile', 'post_detail', 'follow_index',
+            'api_posts', 'api_group_posts', 'api_post_detail', 'api_comments',
+        })
+        self.assertLess(
+            results['api_post_detail']['bytes'],
+            results['post_detail']['bytes'],
+        )
+        self.assertEqual(benchmarks.compare(results, results), [])
+
+    def test_compare_reports_regressions(self):
+        """Рост времени сверх допуска и рост числа запросов — регрессия."""
+        baseline = {'index': {'p50_ms': 10, 'p95_ms': 20, 'queries': 2}}
+        results = {'index': {'p50_ms': 11, 'p95_ms': 30, 'queries': 3}}
+        self.assertEqual(benchmarks.compare(results, baseline), [
+            'index.p95_ms: 30 > 24', 'index.queries: 3 > 2'
+        ])
@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import cards
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(
+            username='card_author', first_name='Лев', last_name='Толстой'
+        )
+        cls.edited = Post.objects.create(author=cls.author, text='Первый')
+        cls.other = Post.objects.create(author=cls.author, text='Второй')
+
+    def setUp(self):
+        cache.clear()
+
+    def version(self, post):
+        return Post.objects.values_list('version', flat=True).get(pk=post.pk)
+
+    def test_cards_are_rendered_once(self):
+        """Карточки с главной переиспользуются на странице профиля."""
+        self.client.get(reverse('posts:index'))
+        with mock.patch.object(
+            cards, 'render_to_string', wraps=cards.render_to_string
+        ) as render:
+            response = self.client.get(
+                reverse('posts:profile', args=[self.author.username])
+            )
+        self.assertContains(response, 'Второй')
+        render.assert_not_called()
+
+    def test_edit_after_concurrent_bump_renders_new_card(self):
+        """Правка поверх версии, поднятой комментарием, видна в ленте."""
+        post = Post.objects.get(pk=self.edited.pk)
+        Comment.objects.create(post=post, author=self.author, text='Ответ')
+        self.client.get(reverse('posts:index'))
+        post.text = 'После комментария'
+        post.save()
+        self.assertEqual(post.version, self.version(post))
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'После комментария')
+
+    def test_edit_invalidates_only_its_card(self):
+        """Правка поста меняет версию только этого поста."""
+        other_version = self.version(self.other)
+        self.edited.text = 'Исправленный'
+        self.edited.save()
+        self.assertEqual(self.edited.version, self.version(self.edited))
+        self.assertEqual(self.version(self.other), other_version)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Исправленный')
+
+    def test_comment_and_author_name_bump_version(self):
+        """Комментарий и новое имя автора меняют видимые в карточке данные."""
+        before = self.version(self.other)
+        Comment.objects.create(post=self.other, author=self.author, text='К')
+        self.assertEqual(self.version(self.other), before + 1)
+        self.author.first_name = 'Фёдор'
+        self.author.save()
+        self.assertEqual(self.version(self.other), before + 2)
+        self.author.save(update_fields=['last_login'])
+        self.assertEqual(self.version(self.other), before + 2)
+
+    def test_rename_reaches_cached_pages(self):
+        """Новое имя автора видно и на закэшированных главной и группе."""
+        group = Group.objects.create(
+            title='Группа', slug='cards-group', description='Описание'
+        )
+        Post.objects.create(author=self.author, group=group, text='В группе')
+        urls = [reverse('posts:index'), reverse('posts:group_list',
+                                                args=[group.slug])]
+        for url in urls:
+            self.client.get(url)
+        self.author.first_name = 'Фёдор'
+        self.author.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response['X-Cache'], 'MISS')
+                self.assertContains(response, 'Фёдор Толстой')
+
+    def test_group_delete_removes_links_from_cards(self):
+        group = Group.objects.create(
+            title='Группа', slug='deleted-group', description='Описание'
+        )
+        Post.objects.create(author=self.author, group=group, text='В группе')
+        self.client.get(reverse('posts:index'))
+        link = reverse('posts:group_list', args=[group.slug])
+        group.delete()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'В группе')
+        self.assertNotContains(response, link)
@@ -0,0 +1,109 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..follows import follow_pairs
+from ..models import FeedEntry, Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class FollowsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='reader')
+        cls.authors = [
+            User.objects.create(username=f'author_{number}')
+            for number in range(3)
+        ]
+        cls.post = Post.objects.create(author=cls.authors[0], text='Пост')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_repeated_follow_creates_one_row(self):
+        """Повторная подписка не создаёт дубль и не меняет счётчики."""
+        url = reverse('posts:profile_follow', args=['author_0'])
+        self.reader_client.get(url)
+        self.reader_client.get(url)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(UserStats.objects.get(user=self.reader).following, 1)
+
+    def test_racing_follow_does_not_overcount(self):
+        """Пара, вставленная соседним запросом, не считается дважды."""
+        pair = (self.reader.pk, self.authors[0].pk)
+        follow_pairs([pair], backfill=False)
+        real_filter = Follow.objects.filter
+        # Соседний запрос вставил подписку уже после нашей проверки.
+        stale = iter([mock.Mock(**{'values_list.return_value': []})])
+
+        def filter(*args, **kwargs):
+            return next(stale, None) or real_filter(*args, **kwargs)
+
+        with mock.patch.object(Follow.objects, 'filter', filter):
+            follow_pairs([pair], backfill=False)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(UserStats.objects.get(user=self.reader).following, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.authors[0]).followers, 1
+        )
+
+    def test_bulk_follow(self):
+        """Массовая подписка создаёт подписки, счётчики и ленту."""
+        Follow.objects.create(user=self.reader, author=self.authors[1])
+        response = self.reader_client.post(
+            reverse('posts:profile_follow_many'),
+            {'authors': 'author_0, author_1 author_2 reader nobody'},
+        )
+        self.assertRedirects(response, reverse('posts:follow_index'))
+        self.assertEqual(
+            set(Follow.objects.filter(user=self.reader).values_list(
+                'author__username', flat=True
+            )),
+            {'author_0', 'author_1', 'author_2'},
+        )
+        self.assertEqual(UserStats.objects.get(user=self.reader).following, 3)
+        self.assertEqual(
+            UserStats.objects.get(user=self.authors[0]).followers, 1
+        )
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, post=self.post
+        ).exists())
+
+    def test_bulk_follow_requires_post(self):
+        """Массовая подписка принимает только POST."""
+        response = self.reader_client.get(
+            reverse('posts:profile_follow_many')
+        )
+        self.assertEqual(response.status_code, 405)
+
+    def test_import_follows(self):
+        """Граф подписок загружается из CSV с пропуском ошибок."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'follows.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(
+                'user,author\n'
+                'reader,author_0\n'
+                'reader,author_0\n'
+                'author_1,author_2\n'
+                'reader,nobody\n'
+            )
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_follows', path, format='csv', stdout=out, stderr=err
+        )
+        self.assertIn('Новых подписок: 2', out.getvalue())
+        self.assertIn('Строка 4: Автор не найден: nobody', err.getvalue())
+        self.assertEqual(
+            UserStats.objects.get(user=self.authors[2]).followers, 1
+        )
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import groups
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class GroupCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='group_author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='cached-group', description='Описание'
+        )
+        cls.other = Group.objects.create(
+            title='Другая', slug='other-group', description='Описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def count(self, group):
+        group.refresh_from_db(fields=['posts_count'])
+        return group.posts_count
+
+    def test_warm_group_page_skips_database(self):
+        """Повторный запрос страницы группы не обращается к БД."""
+        Post.objects.create(author=self.author, group=self.group, text='1')
+        url = reverse('posts:group_list', args=[self.group.slug])
+        Client().get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(url)
+        self.assertEqual(len(queries), 0)
+        self.assertContains(response, 'Записей: 1')
+
+    def test_posts_count_follows_posts(self):
+        """Счётчик меняется при создании, переносе и удалении поста."""
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Пост'
+        )
+        Post.objects.create(author=self.author, text='Без группы')
+        self.assertEqual(self.count(self.group), 1)
+        post.group = self.other
+        post.save()
+        self.assertEqual(self.count(self.group), 0)
+        self.assertEqual(self.count(self.other), 1)
+        post.delete()
+        self.assertEqual(self.count(self.other), 0)
+
+    def test_recount_restores_counts(self):
+        """recount() исправляет разошедшиеся счётчики."""
+        Post.objects.create(author=self.author, group=self.group, text='1')
+        Group.objects.update(posts_count=7)
+        groups.recount()
+        self.assertEqual(self.count(self.group), 1)
+        self.assertEqual(self.count(self.other), 0)
+
+    def test_renamed_slug_is_forgotten(self):
+        """После смены slug старый адрес отдаёт 404, новый работает."""
+        group = Group.objects.create(
+            title='Старая', slug='old-slug', description='Описание'
+        )
+        self.assertEqual(groups.get_group_or_404('old-slug'), group)
+        group.slug = 'new-slug'
+        group.save()
+        old = Client().get(reverse('posts:group_list', args=['old-slug']))
+        new = Client().get(reverse('posts:group_list', args=['new-slug']))
+        self.assertEqual(old.status_code, 404)
+        self.assertEqual(new.status_code, 200)
@@ -0,0 +1,72 @@
+import threading
+from unittest import mock
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .. import parallel, views
+from core import profiling, replicas
+
+
+class GatherTest(SimpleTestCase):
+    def test_sequential_by_default(self):
+        """Без настройки все вызовы идут в текущем потоке."""
+        threads = parallel.gather(
+            threading.get_ident, threading.get_ident
+        )
+        self.assertEqual(set(threads), {threading.get_ident()})
+
+    @override_settings(POSTS_PARALLEL_FETCH=True)
+    def test_parallel_keeps_order(self):
+        """В пуле результаты возвращаются в порядке вызовов."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def meet(value):
+            barrier.wait()
+            return value
+
+        self.assertEqual(
+            parallel.gather(lambda: meet(1), lambda: meet(2)), [1, 2]
+        )
+
+    @override_settings(POSTS_PARALLEL_FETCH=True)
+    def test_parallel_raises_errors(self):
+        """Исключение из потока пула доходит до вызывающего."""
+        def fail():
+            raise ValueError('ошибка')
+
+        with self.assertRaises(ValueError):
+            parallel.gather(lambda: 1, fail)
+
+
+@override_settings(POSTS_PARALLEL_FETCH=True)
+class GatherContextTest(TestCase):
+    def test_pool_threads_share_request_state(self):
+        """Запросы пула попадают в профиль запроса и читают с реплики."""
+        profile = profiling.start()
+        self.addCleanup(profiling.stop)
+        replicas.use_replica('default')
+        self.addCleanup(replicas.use_replica, False)
+
+        def query():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return (
+                threading.get_ident(), profiling.current(),
+                replicas.reading_replica(),
+            )
+
+        _, (thread, current, replica) = parallel.gather(lambda: None, query)
+        self.assertNotEqual(thread, threading.get_ident())
+        self.assertIs(current, profile)
+        self.assertEqual(replica, 'default')
+        self.assertEqual(profile.queries, 1)
+
+    def test_missing_post_does_not_render_comments(self):
+        with mock.patch.object(views, '_comments_fragment') as fragment:
+            response = self.client.get(
+                reverse('posts:post_detail', args=[404])
+            )
+        self.assertEqual(response.status_code, 404)
+        fragment.assert_not_called()
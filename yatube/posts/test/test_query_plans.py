@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import query_plans
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryPlansTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='posts_author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.create(author=cls.author, group=cls.group, text='Пост')
+
+    def plan_warnings(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        return query_plans.explain(sql, params)[1]
+
+    def test_hot_paths_use_indexes(self):
+        """Ленты группы и автора читаются по составным индексам."""
+        for queryset in (
+            Post.objects.filter(group=self.group).order_by('-pub_date', '-id'),
+            Post.objects.filter(author=self.author).order_by(
+                '-pub_date', '-id'
+            ),
+            Follow.objects.filter(user=self.author, author=self.author),
+        ):
+            with self.subTest(query=str(queryset.query)):
+                self.assertEqual(self.plan_warnings(queryset), [])
+
+    def test_full_scan_is_flagged(self):
+        """Поиск по неиндексированной колонке отмечается."""
+        warnings = self.plan_warnings(Post.objects.filter(text='Пост'))
+        self.assertTrue(warnings)
+        self.assertIn('полный просмотр', warnings[0])
+
+    def test_capture_records_page_queries(self):
+        """capture() возвращает SELECT-запросы страницы без повторов."""
+        queries = query_plans.capture(
+            reverse('posts:group_list', args=[self.group.slug])
+        )
+        self.assertTrue(queries)
+        self.assertTrue(all(sql.startswith('SELECT') for sql, _ in queries))
+        self.assertEqual(len({sql for sql, _ in queries}), len(queries))
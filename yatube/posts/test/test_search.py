@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Post
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='search_author')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, query, **params):
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': query, **params}
+        )
+        return response.context['page_obj']
+
+    def test_search_finds_new_and_edited_posts(self):
+        """Индекс обновляется при создании, правке и удалении поста."""
+        post = Post.objects.create(author=self.author, text='Пишу про ёжиков')
+        self.assertEqual(list(self.found('ёжиков')), [post])
+        post.text = 'Теперь про котов'
+        post.save()
+        self.assertEqual(list(self.found('ёжиков')), [])
+        self.assertEqual(list(self.found('котов')), [post])
+        post.delete()
+        self.assertEqual(list(self.found('котов')), [])
+
+    def test_results_are_ranked_and_highlighted(self):
+        """Чаще упомянутый термин выше, совпадения выделены."""
+        Post.objects.create(author=self.author, text='кот и собака')
+        best = Post.objects.create(author=self.author, text='кот кот кот')
+        results = list(self.found('кот'))
+        self.assertEqual(results[0], best)
+        self.assertIn('<mark>кот</mark>', results[1].snippet)
+
+    def test_snippet_is_escaped(self):
+        """Текст поста в сниппете экранируется."""
+        Post.objects.create(author=self.author, text='<b>жирный</b> текст')
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'текст'}
+        )
+        self.assertContains(response, '&lt;b&gt;жирный&lt;/b&gt;')
+        self.assertContains(response, '<mark>текст</mark>')
+
+    def test_cursor_pagination(self):
+        """Курсоры листают выдачу без пропусков и повторов."""
+        posts = Post.objects.bulk_create(
+            Post(author=self.author, text=f'пост номер {i}')
+            for i in range(25)
+        )
+        search.rebuild()
+        seen = []
+        page = self.found('пост')
+        seen += page
+        while page.next_cursor:
+            page = self.found('пост', cursor=page.next_cursor)
+            seen += page
+        self.assertEqual(len(seen), len(posts))
+        self.assertEqual(len(set(seen)), len(posts))
+        previous = self.found('пост', cursor=page.previous_cursor)
+        self.assertEqual(list(previous), seen[-15:-5])
+        self.assertContains(
+            self.guest_client.get(
+                reverse('posts:search'),
+                {'q': 'пост', 'cursor': previous.next_cursor},
+            ),
+            'q=%D0%BF%D0%BE%D1%81%D1%82&amp;cursor=',
+        )
+
+    def test_empty_and_broken_queries(self):
+        """Пустой запрос и мусорный курсор не ломают страницу."""
+        self.assertIsNone(self.found(''))
+        self.assertIsNone(self.found('"*()'))
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'пост', 'cursor': '!!!'}
+        )
+        self.assertEqual(response.status_code, 200)
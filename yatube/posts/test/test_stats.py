@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from .. import cache, stats
+from ..models import Comment, Follow, Post, UserStats
+from ..stats import reconcile
+
+User = get_user_model()
+
+
+class UserStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='posts_author')
+        cls.follower = User.objects.create(username='follower')
+
+    def test_counters_follow_signals(self):
+        """Счётчики меняются вместе с постами, комментариями и подписками."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.follower, text='Ок')
+        Follow.objects.create(user=self.follower, author=self.author)
+        author = UserStats.objects.get(user=self.author)
+        follower = UserStats.objects.get(user=self.follower)
+        self.assertEqual((author.posts, author.followers), (1, 1))
+        self.assertEqual((follower.comments, follower.following), (1, 1))
+        post.delete()
+        Follow.objects.all().delete()
+        author.refresh_from_db()
+        follower.refresh_from_db()
+        self.assertEqual((author.posts, author.followers), (0, 0))
+        self.assertEqual((follower.comments, follower.following), (0, 0))
+
+    def test_reconcile_fixes_drift(self):
+        """reconcile() исправляет разошедшиеся счётчики."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {number}')
+            for number in range(3)
+        )
+        self.assertEqual(reconcile(), 2)
+        self.assertEqual(UserStats.objects.get(user=self.author).posts, 3)
+        self.assertEqual(reconcile(), 0)
+
+
+class StatsInvalidationTest(TransactionTestCase):
+    def test_profile_version_changes_after_commit(self):
+        """Версия профиля меняется только после записи счётчиков."""
+        author = User.objects.create(username='posts_author')
+        seen = []
+
+        def bump(*namespaces):
+            seen.append(UserStats.objects.get(user=author).posts)
+
+        with mock.patch.object(cache, 'bump', bump):
+            with transaction.atomic():
+                stats.increment(author.pk, posts=2)
+                self.assertEqual(seen, [])
+        self.assertEqual(seen, [2])
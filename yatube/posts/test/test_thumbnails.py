@@ -0,0 +1,115 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import thumbnails
+from ..management.commands import thumbnail_worker
+from ..models import Post, PostImageVariant
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='post_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, name='small.gif'):
+        return Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(name, SMALL_GIF, 'image/gif'),
+        )
+
+    def test_generate_stores_thumbnail(self):
+        """Миниатюра строится вне запроса и сохраняется в посте."""
+        post = self.create_post()
+        self.assertIn(post, thumbnails.pending())
+        self.assertTrue(thumbnails.generate(post.pk))
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail)
+        self.assertEqual(
+            (post.thumbnail_width, post.thumbnail_height), (960, 339)
+        )
+        self.assertNotIn(post, thumbnails.pending())
+
+    def test_variants_rendered_as_srcset(self):
+        """Для каждой ширины и формата есть вариант, шаблон выводит srcset."""
+        post = self.create_post()
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, 'aspect-ratio')
+        thumbnails.generate(post.pk)
+        self.assertEqual(
+            PostImageVariant.objects.filter(post=post).count(),
+            len(thumbnails.WIDTHS) * len(thumbnails.available_formats()),
+        )
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, '320w')
+
+    def test_new_image_resets_thumbnail(self):
+        """Смена картинки возвращает пост в очередь миниатюр."""
+        post = self.create_post()
+        thumbnails.generate(post.pk)
+        post.refresh_from_db()
+        post.image = SimpleUploadedFile('other.gif', SMALL_GIF, 'image/gif')
+        post.save()
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnail)
+        self.assertIn(post, thumbnails.pending())
+
+    def test_broken_image_is_retried_with_backoff(self):
+        """Битая картинка не повторяется в каждом цикле рабочего процесса."""
+        broken = Post.objects.create(
+            author=self.user, text='Битая картинка',
+            image=SimpleUploadedFile('broken.gif', b'not a gif', 'image/gif'),
+        )
+        good = self.create_post()
+        with self.assertLogs(thumbnail_worker.logger, 'ERROR') as logs:
+            call_command(
+                'thumbnail_worker', '--once', '--workers=0',
+                stdout=StringIO(),
+            )
+        self.assertIn(str(broken.pk), logs.output[0])
+        self.assertNotIn(good, thumbnails.pending())
+        self.assertIn(broken, thumbnails.pending())
+
+    def test_failures_back_off_then_give_up(self):
+        failures = thumbnail_worker.Failures(max_attempts=2)
+        with mock.patch.object(thumbnail_worker.time, 'monotonic') as now:
+            now.return_value = 100
+            failures.record(1)
+            self.assertEqual(failures.waiting(), [1])
+            now.return_value = 100 + thumbnail_worker.RETRY_DELAY
+            self.assertEqual(failures.waiting(), [])
+            with self.assertLogs(thumbnail_worker.logger, 'ERROR'):
+                failures.record(1)
+            now.return_value = 10 ** 9
+            self.assertEqual(failures.waiting(), [1])
+        failures.forget(1)
+        self.assertEqual(failures.waiting(), [])
@@ -0,0 +1,106 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import search
+from ..models import FeedEntry, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class TransferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='posts_author')
+        cls.follower = User.objects.create(username='follower')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Follow.objects.create(user=cls.follower, author=cls.author)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'posts')
+
+    def export_and_reload(self, file_format):
+        call_command(
+            'export_posts', self.path, format=file_format, stderr=StringIO()
+        )
+        Post.objects.all().delete()
+        out = StringIO()
+        call_command(
+            'import_posts', self.path, format=file_format, batch_size=2,
+            stdout=out, stderr=StringIO(),
+        )
+        return out.getvalue()
+
+    def test_round_trip_keeps_posts(self):
+        """Выгрузка и загрузка сохраняют текст, дату, автора и группу."""
+        for number in range(5):
+            Post.objects.create(
+                author=self.author, group=self.group, text=f'Пост {number}'
+            )
+        expected = sorted(Post.objects.values_list(
+            'text', 'pub_date', 'author', 'group'
+        ))
+        for file_format in ('ndjson', 'csv'):
+            with self.subTest(file_format=file_format):
+                self.assertIn(
+                    'Загружено постов: 5', self.export_and_reload(file_format)
+                )
+                self.assertEqual(sorted(Post.objects.values_list(
+                    'text', 'pub_date', 'author', 'group'
+                )), expected)
+
+    def test_import_repeats_signal_side_effects(self):
+        """После загрузки обновлены счётчики, поиск и ленты."""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(
+                '{"text": "Импортированный пост", "author": "posts_author"}\n'
+                '\n'
+                '{"text": "Чужой пост", "author": "nobody"}\n'
+            )
+        err = StringIO()
+        call_command(
+            'import_posts', self.path, stdout=StringIO(), stderr=err
+        )
+        post = Post.objects.get()
+        self.assertIn('Автор не найден: nobody', err.getvalue())
+        self.assertEqual(UserStats.objects.get(user=self.author).posts, 1)
+        self.assertEqual(list(search.search('импортированный')), [post])
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.follower, post=post
+        ).exists())
+
+    def test_bad_rows_are_skipped_and_reported(self):
+        """Строки без автора, не объекты и битый JSON не прерывают загрузку."""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(
+                '{"text": "x", "author": ""}\n'
+                '{"text": "x"}\n'
+                '["x"]\n'
+                '{"text": \n'
+                '{"text": "x", "author": ["posts_author"]}\n'
+                '{"text": "x", "author": "posts_author", '
+                '"pub_date": "2020-13-45T00:00:00"}\n'
+                '{"text": "x", "author": "posts_author", "pub_date": 123}\n'
+                '{"text": "Целый пост", "author": "posts_author"}\n'
+            )
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_posts', self.path, batch_size=2, stdout=out, stderr=err
+        )
+        self.assertEqual(Post.objects.get().text, 'Целый пост')
+        self.assertIn('Загружено постов: 1, пропущено: 7', out.getvalue())
+        self.assertIn('Строка 1: Автор не указан', err.getvalue())
+        self.assertIn('Строка 2: Автор не указан', err.getvalue())
+        self.assertIn('Строка 3: Строка не является объектом', err.getvalue())
+        self.assertIn('Строка 4: Неверный JSON', err.getvalue())
+        self.assertIn('Строка 6: Неверная дата', err.getvalue())
+        self.assertIn('Строка 7: Неверная дата: 123', err.getvalue())
@@ -1,3 +1,6 @@
+import time
+from unittest import mock
+
 from django import forms
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
@@ -5,7 +8,12 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase
 from django.urls import reverse
 
-from ..models import Follow, Post, Group
+from ..authors import get_author
+from .. import cache as page_cache
+from ..cache import cache_stats
+from ..models import Comment, Follow, Post, Group
+from ..paginator import encode_cursor
+from ..views import COMMENTS_PER_PAGE, POSTS_PER_PAGE
 
 User = get_user_model()
 
@@ -195,6 +203,124 @@ class PaginatorViewsTest(TestCase):
                 self.assertEqual(len(response.context[objects]), 3)
 
 
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(
+            username='posts_author',
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Test {value}', author=cls.user)
+            for value in range(13)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_cursor_navigation(self):
+        """Курсоры ведут на следующую и предыдущую страницы."""
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        self.assertEqual(len(first), 10)
+        self.assertIsNone(first.previous_cursor)
+        second = self.client.get(
+            url, {'cursor': first.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(len(second), 3)
+        self.assertIsNone(second.next_cursor)
+        self.assertEqual(
+            set(first.object_list) & set(second.object_list), set()
+        )
+        back = self.client.get(
+            url, {'cursor': second.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back.object_list), list(first.object_list))
+
+    def test_broken_cursor_returns_first_page(self):
+        """Битый курсор не ломает страницу."""
+        response = self.client.get(
+            reverse('posts:index'), {'cursor': 'not-a-cursor'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+    def test_cursor_with_wrong_types_returns_first_page(self):
+        """Подделанные значения курсора не приводят к ошибке 500."""
+        for values in (
+            ['n', 'abc', 'abc'],
+            ['n', 1, 2],
+            ['n', 1.5, True],
+            ['n', '2020-01-01T00:00:00', 'zz'],
+        ):
+            with self.subTest(values=values):
+                response = self.client.get(
+                    reverse('posts:index'),
+                    {'cursor': encode_cursor(*values)},
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertIsNone(
+                    response.context['page_obj'].previous_cursor
+                )
+
+
+class ListingQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='posts_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(POSTS_PER_PAGE):
+            author = User.objects.create_user(username=f'author_{number}')
+            group = Group.objects.create(
+                title=f'Группа {number}',
+                slug=f'group_{number}',
+                description='Описание',
+            )
+            post = Post.objects.create(
+                author=cls.author if number % 2 else author,
+                group=cls.group if number % 2 else group,
+                text=f'Пост {number}',
+            )
+            Comment.objects.create(post=post, author=author, text='Текст')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_listing_query_count(self):
+        """Число запросов ленты не зависит от количества постов."""
+        get_author(self.author.username)
+        pages = {
+            reverse('posts:index'): 2,
+            reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}
+            ): 3,
+            reverse(
+                'posts:profile', kwargs={'username': self.author.username}
+            ): 3,
+        }
+        for url, queries in pages.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    self.guest_client.get(url)
+
+    def test_follow_index_query_count(self):
+        """Лента подписок читается за постоянное число запросов."""
+        self.reader_client.get(reverse('posts:follow_index'))
+        with self.assertNumQueries(5):
+            self.reader_client.get(reverse('posts:follow_index'))
+
+
 class FollowViewsTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -284,19 +410,184 @@ class CacheIndexPageTest(TestCase):
         cls.user = User.objects.create(
             username='posts_author',
         )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
 
     def setUp(self):
+        cache.clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
 
     def test_cache(self):
-        content = self.authorized_client.get(reverse('posts:index')).content
+        """Главная страница отдаётся из кэша, пока посты не менялись."""
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        response_1 = self.authorized_client.get(reverse('posts:index'))
+        self.assertEqual(response_1['X-Cache'], 'HIT')
+        self.assertEqual(response.content, response_1.content)
+        self.assertEqual(cache_stats()['index'], {'hits': 1, 'misses': 1})
+
+    def test_new_post_invalidates_cache(self):
+        """Новый пост сразу виден на главной и на странице группы."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+        )
+        for url in urls:
+            self.authorized_client.get(url)
         Post.objects.create(
             text='Пост 1',
             author=self.user,
+            group=self.group,
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response['X-Cache'], 'MISS')
+                self.assertContains(response, 'Пост 1')
+
+    def test_pages_cached_separately(self):
+        """Разные страницы ленты кэшируются под разными ключами."""
+        Post.objects.bulk_create(
+            Post(text=f'Test {value}', author=self.user)
+            for value in range(13)
+        )
+        first = self.authorized_client.get(reverse('posts:index'))
+        second = self.authorized_client.get(
+            reverse('posts:index'), {'page': 2}
+        )
+        self.assertEqual(second['X-Cache'], 'MISS')
+        self.assertNotEqual(first.content, second.content)
+
+    def test_local_cache_expires_quickly(self):
+        """С кэшем в памяти процесса страница и версии живут недолго:
+        воркер не видит изменений, сделанных в других процессах."""
+        self.assertTrue(page_cache.PROCESS_LOCAL)
+        url = reverse('posts:index')
+        self.authorized_client.get(url)
+        version = page_cache.get_version('index')
+        later = time.time() + page_cache.LOCAL_TIMEOUT + 1
+        with mock.patch('time.time', return_value=later):
+            response = self.authorized_client.get(url)
+            self.assertEqual(response['X-Cache'], 'MISS')
+            self.assertNotEqual(page_cache.get_version('index'), version)
+
+
+class CommentsViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='post_author')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {n}.')
+            for n in range(COMMENTS_PER_PAGE + 5)
         )
-        content_1 = self.authorized_client.get(reverse('posts:index')).content
-        self.assertEqual(content, content_1)
+
+    def setUp(self):
         cache.clear()
-        content_2 = self.authorized_client.get(reverse('posts:index')).content
-        self.assertNotEqual(content_1, content_2)
+        self.url = reverse('posts:post_detail', args=[self.post.pk])
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_comments_are_paginated(self):
+        """Комментарии выводятся страницами от старых к новым."""
+        response = self.authorized_client.get(self.url)
+        self.assertContains(response, 'Комментарий 0.')
+        self.assertNotContains(response, f'Комментарий {COMMENTS_PER_PAGE}.')
+        cursor = response.content.decode().split('?cursor=')[1].split('"')[0]
+        response = self.authorized_client.get(self.url, {'cursor': cursor})
+        self.assertContains(response, f'Комментарий {COMMENTS_PER_PAGE}.')
+        self.assertNotContains(response, 'Комментарий 0.')
+
+    def test_comments_fragment_is_cached(self):
+        """Повторный показ берёт комментарии из кэша без запросов к ним."""
+        self.authorized_client.get(self.url)
+        with self.assertNumQueries(5):
+            self.authorized_client.get(self.url)
+
+    def test_new_comment_invalidates_fragment(self):
+        """Новый комментарий сразу виден на странице поста."""
+        Comment.objects.filter(post=self.post).delete()
+        self.authorized_client.get(self.url)
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Свежий комментарий'},
+        )
+        self.assertContains(
+            self.authorized_client.get(self.url), 'Свежий комментарий'
+        )
+
+    def test_rename_refreshes_comment_authors(self):
+        """После смены имени комментарии ведут на новый профиль."""
+        self.authorized_client.get(self.url)
+        author = User.objects.get(pk=self.user.pk)
+        author.username = 'renamed_author'
+        author.save()
+        response = self.authorized_client.get(self.url)
+        self.assertContains(
+            response, reverse('posts:profile', args=['renamed_author'])
+        )
+        self.assertNotContains(
+            response, reverse('posts:profile', args=['post_author'])
+        )
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='post_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+
+    def test_unchanged_pages_return_304(self):
+        """Страница с прежним ETag отдаёт 304 без рендеринга."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(1 if 'posts/' in url else 0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_changes_update_validators(self):
+        """Новый комментарий и новый пост меняют ETag страниц."""
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        Post.objects.create(
+            text='Ещё пост', author=self.user, group=self.group
+        )
+        Comment.objects.create(post=self.post, author=self.user, text='К')
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_last_modified_only_for_guests(self):
+        """Last-Modified получают только анонимные посетители."""
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        cached = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(cached.status_code, 304)
+        self.client.force_login(self.user)
+        self.assertNotIn('Last-Modified', self.client.get(url))
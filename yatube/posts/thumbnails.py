@@ -0,0 +1,114 @@
+"""Фоновая подготовка миниатюр для картинок постов.
+
+Миниатюры строятся не при первом показе страницы, а рабочим процессом
+`manage.py thumbnail_worker` сразу после сохранения поста: посты с
+картинкой и пустым полем `thumbnail` и есть очередь заданий. Для каждой
+картинки готовится набор ширин в JPEG и в современных форматах, которые
+умеет сохранять установленный Pillow (WebP, AVIF); они попадают в
+`PostImageVariant` и выводятся через `srcset`. Самый широкий JPEG
+записывается в `Post.thumbnail` как основная картинка, а пока её нет,
+шаблоны показывают заглушку.
+"""
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from PIL import Image, ImageOps
+
+from . import cache
+from .models import Post, PostImageVariant
+
+WIDTHS = (320, 640, 960)
+ASPECT_RATIO = 960 / 339
+FORMATS = (
+    ('AVIF', 'image/avif', 'avif'),
+    ('WEBP', 'image/webp', 'webp'),
+    ('JPEG', 'image/jpeg', 'jpg'),
+)
+QUALITY = 80
+
+
+def available_formats():
+    """Форматы из FORMATS, которые может сохранить текущая сборка Pillow."""
+    Image.init()
+    return [fmt for fmt in FORMATS if fmt[0] in Image.SAVE]
+
+
+def pending():
+    """Посты, для которых миниатюра ещё не построена."""
+    return Post.objects.filter(thumbnail='').exclude(image='').order_by('pk')
+
+
+def _encode(image, image_format):
+    buffer = BytesIO()
+    image.save(buffer, image_format, quality=QUALITY)
+    return ContentFile(buffer.getvalue())
+
+
+def build_variants(post):
+    """Сохраняет все ширины и форматы картинки поста, не трогая БД."""
+    with post.image.open() as source:
+        original = Image.open(source)
+        original = original.convert('RGB')
+    variants = []
+    for width in WIDTHS:
+        height = round(width / ASPECT_RATIO)
+        resized = ImageOps.fit(original, (width, height), Image.LANCZOS)
+        for image_format, mime_type, extension in available_formats():
+            name = default_storage.save(
+                f'posts/variants/{post.pk}_{width}.{extension}',
+                _encode(resized, image_format),
+            )
+            variants.append(PostImageVariant(
+                post=post,
+                image=name,
+                width=width,
+                height=height,
+                mime_type=mime_type,
+            ))
+    return variants
+
+
+def _delete_files(names):
+    for name in names:
+        default_storage.delete(name)
+
+
+def generate(post_id):
+    """Строит миниатюры поста и сохраняет их в модели."""
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'group', 'author'
+    ).first()
+    if post is None or not post.image:
+        return False
+    variants = build_variants(post)
+    main = max(
+        (v for v in variants if v.mime_type == 'image/jpeg'),
+        key=lambda variant: variant.width,
+    )
+    stale = PostImageVariant.objects.filter(post_id=post_id)
+    with transaction.atomic():
+        stale_names = list(stale.values_list('image', flat=True))
+        updated = Post.objects.filter(
+            pk=post_id, image=post.image.name
+        ).update(
+            thumbnail=main.image.name,
+            thumbnail_width=main.width,
+            thumbnail_height=main.height,
+            version=F('version') + 1,
+        )
+        if updated:
+            stale.delete()
+            PostImageVariant.objects.bulk_create(variants)
+    if not updated:
+        # Картинку успели заменить, построенные файлы уже не нужны.
+        _delete_files(variant.image.name for variant in variants)
+        return False
+    _delete_files(stale_names)
+    groups = [f'group:{post.group_id}'] if post.group_id else []
+    cache.bump(
+        'index', f'post:{post_id}', f'author:{post.author_id}', *groups
+    )
+    return True
@@ -0,0 +1,212 @@
+"""Массовая выгрузка и загрузка постов в NDJSON и CSV.
+
+Файлы читаются и пишутся построчно генераторами, а посты создаются
+`bulk_create` пачками, каждая в своей транзакции, так что расход памяти
+не зависит от размера файла. `bulk_create` не отправляет сигналы,
+поэтому после каждой пачки загрузка сама обновляет то, что при обычном
+сохранении делают сигналы: счётчики, поисковый индекс, ленты и кэш.
+"""
+import csv
+import json
+from collections import Counter
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import cache, feed, groups, search, stats
+from .models import Group, Post
+
+User = get_user_model()
+
+FORMATS = ('ndjson', 'csv')
+FIELDS = ('id', 'text', 'pub_date', 'author', 'group', 'image')
+
+
+class RowError(ValueError):
+    """Строку файла нельзя превратить в пост."""
+
+
+def read_rows(stream, file_format):
+    """Словари строк файла; пустые строки NDJSON пропускаются.
+
+    Вместо строки NDJSON, которая не разбирается как JSON, выдаётся
+    `RowError`: загрузка пропустит её и продолжит со следующей.
+    """
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            yield RowError(f'Неверный JSON: {error}')
+
+
+def write_rows(stream, rows, file_format):
+    """Пишет словари строк в поток, возвращает их число."""
+    written = 0
+    if file_format == 'csv':
+        writer = csv.DictWriter(stream, FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+        return written
+    for row in rows:
+        stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+        written += 1
+    return written
+
+
+def export_rows(chunk_size=2000):
+    """Все посты по возрастанию id, без загрузки таблицы в память."""
+    posts = Post.objects.order_by('pk').values_list(
+        'pk', 'text', 'pub_date', 'author__username', 'group__slug', 'image'
+    )
+    for pk, text, pub_date, author, group, image in posts.iterator(
+        chunk_size=chunk_size
+    ):
+        yield {
+            'id': pk,
+            'text': text,
+            'pub_date': pub_date.isoformat(),
+            'author': author,
+            'group': group or '',
+            'image': image or '',
+        }
+
+
+def _parse_date(value):
+    if not value:
+        return timezone.now()
+    try:
+        pub_date = parse_datetime(value)
+    except (TypeError, ValueError):
+        pub_date = None
+    if pub_date is None:
+        raise RowError(f'Неверная дата: {value}')
+    if timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date, timezone.utc)
+    return pub_date
+
+
+class Lookup:
+    """Кэш `ключ -> id` для пользователей или групп, дозапрашиваемый пачкой.
+
+    В памяти остаются только уже встреченные ключи, а не вся таблица.
+    """
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.ids = {}
+
+    def load(self, keys):
+        missing = set(keys) - set(self.ids) - {''}
+        if missing:
+            self.ids.update(self.queryset.filter(
+                **{f'{self.field}__in': missing}
+            ).values_list(self.field, 'pk'))
+
+    def get(self, key, label):
+        if not key:
+            return None
+        if not isinstance(key, str) or key not in self.ids:
+            raise RowError(f'{label} не найден: {key}')
+        return self.ids[key]
+
+
+def _keys(rows, field):
+    return [
+        row[field] for row in rows if isinstance(row.get(field), str)
+    ]
+
+
+@contextmanager
+def keep_pub_date():
+    """Отключает auto_now_add, чтобы сохранить даты из файла."""
+    field = Post._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Importer:
+    """Загружает посты пачками и повторяет побочные эффекты сигналов.
+
+    Ошибки копятся в `errors` парами `(номер записи, текст)`; записи
+    нумеруются с единицы без заголовка CSV и пустых строк NDJSON.
+    """
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.authors = Lookup(User.objects, 'username')
+        self.groups = Lookup(Group.objects, 'slug')
+        self.created = 0
+        self.errors = []
+
+    def run(self, rows):
+        rows = enumerate(rows, start=1)
+        with keep_pub_date():
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    return self.created
+                self.import_batch(batch)
+
+    def build(self, row):
+        if isinstance(row, RowError):
+            raise row
+        if not isinstance(row, dict):
+            raise RowError('Строка не является объектом')
+        if not row.get('text'):
+            raise RowError('Пустой текст')
+        if not row.get('author'):
+            raise RowError('Автор не указан')
+        return Post(
+            text=row['text'],
+            pub_date=_parse_date(row.get('pub_date')),
+            author_id=self.authors.get(row['author'], 'Автор'),
+            group_id=self.groups.get(row.get('group') or '', 'Группа'),
+            image=row.get('image') or '',
+        )
+
+    def import_batch(self, batch):
+        objects = [row for _, row in batch if isinstance(row, dict)]
+        self.authors.load(_keys(objects, 'author'))
+        self.groups.load(_keys(objects, 'group'))
+        posts = []
+        for number, row in batch:
+            try:
+                posts.append(self.build(row))
+            except RowError as error:
+                self.errors.append((number, str(error)))
+        with transaction.atomic():
+            last_id = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+            Post.objects.bulk_create(posts)
+            self.after_batch(last_id)
+        self.created += len(posts)
+
+    def after_batch(self, last_id):
+        created = list(Post.objects.filter(pk__gt=last_id).values_list(
+            'pk', 'author_id', 'pub_date', 'group_id'
+        ))
+        per_author = Counter(author_id for _, author_id, _, _ in created)
+        for author_id, count in per_author.items():
+            stats.increment(author_id, posts=count)
+        search.index_after(last_id)
+        feed.fan_out_many([post[:3] for post in created])
+        per_group = Counter(group_id for *_, group_id in created)
+        per_group.pop(None, None)
+        for group_id, count in per_group.items():
+            groups.increment(group_id, count)
+        cache.bump('index', *(f'group:{pk}' for pk in per_group))
@@ -15,7 +15,13 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path('search/', views.search_posts, name='search'),
     path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'follow/bulk/',
+        views.profile_follow_many,
+        name='profile_follow_many'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,35 +1,80 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
-
-from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Comment, Follow
+from django.template.loader import render_to_string
+from django.views.decorators.http import require_POST
+
+from . import cards, feed, follows, parallel, search
+from .groups import get_group_or_404
+from .authors import get_author_or_404
+from .cache import cached_fragment, cached_page, conditional_page
+from .forms import CommentForm, FollowManyForm, PostForm
+from .models import Post, Comment, Follow
+from .paginator import CursorPaginator
+from .stats import stats_for
 
 POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
 
 
 def function_paginator(request, posts):
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return page_obj
+    paginator = CursorPaginator(
+        posts, POSTS_PER_PAGE, approximate_count=True
+    )
+    return paginator.page_from_request(request)
+
+
+def _index_namespaces(request):
+    return ['index']
+
+
+def _group_namespaces(request, slug):
+    return [f'group:{get_group_or_404(slug).pk}']
+
+
+def _profile_namespaces(request, username):
+    return [f'author:{get_author_or_404(username).pk}']
+
+
+def _post_namespaces(request, post_id):
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group_id'
+    ).first()
+    if post is None:
+        return None
+    author_id, group_id = post
+    namespaces = [
+        f'post:{post_id}', f'comments:{post_id}', f'author:{author_id}'
+    ]
+    if group_id:
+        namespaces.append(f'group:{group_id}')
+    return namespaces
 
 
-@cache_page(20, key_prefix='index_page')
+@conditional_page(_index_namespaces)
 def index(request):
-    posts = Post.objects.all()
+    return cached_page(request, 'index', _index_page)
+
+
+def _index_page(request):
+    posts = Post.objects.for_listing()
     page_obj = function_paginator(request, posts)
+    cards.attach(page_obj.object_list)
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@conditional_page(_group_namespaces)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group).all()
+    group = get_group_or_404(slug)
+    return cached_page(request, f'group:{group.pk}', _group_page, group)
+
+
+def _group_page(request, group):
+    posts = Post.objects.for_listing().filter(group=group)
     page_obj = function_paginator(request, posts)
+    cards.attach(page_obj.object_list, show_group=False)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -37,26 +82,46 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_page(_profile_namespaces)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=author)
-    page_obj = function_paginator(request, posts)
-    following = None
-    if request.user.is_authenticated:
-        following = author.following.filter(user=request.user).exists()
+    author = get_author_or_404(username)
+    posts = Post.objects.for_listing().filter(author=author)
+    user_id = request.user.pk
+    page_obj, following, stats = parallel.gather(
+        lambda: function_paginator(request, posts),
+        lambda: _is_following(author, user_id),
+        lambda: stats_for(author),
+    )
+    cards.attach(page_obj.object_list)
     context = {
         'page_obj': page_obj,
         'author': author,
+        'stats': stats,
         'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+def _is_following(author, user_id):
+    if user_id is None:
+        return None
+    return author.following.filter(user_id=user_id).exists()
+
+
+@conditional_page(_post_namespaces)
 def post_detail(request, post_id):
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post=post_id)
-    posts = get_object_or_404(Post, id=post_id)
-    count = Post.objects.filter(author=posts.author.id).count()
+    # Комментарии рендерятся и кэшируются только для существующего поста.
+    posts = get_object_or_404(
+        Post.objects.select_related(
+            'author__stats', 'group'
+        ).prefetch_related('variants'),
+        id=post_id
+    )
+    comments = cached_fragment(
+        request, f'comments:{post_id}', _comments_fragment, post_id
+    )
+    count = stats_for(posts.author).posts
     context = {
         'posts': posts,
         'count': count,
@@ -66,6 +131,32 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def _comments_fragment(request, post_id):
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    ).only('text', 'created', 'post_id', 'author__username')
+    page_obj = CursorPaginator(
+        comments, COMMENTS_PER_PAGE, ordering=('created', 'id')
+    ).page_from_request(request)
+    return render_to_string(
+        'posts/includes/comments.html',
+        {'page_obj': page_obj},
+        request=request,
+    )
+
+
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = search.search(
+        query, request.GET.get('cursor'), per_page=POSTS_PER_PAGE
+    )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -87,7 +178,7 @@ def post_create(request):
 def post_edit(request, post_id):
     is_edit = True
     post = get_object_or_404(Post, id=post_id)
-    if request.user.username != post.author.username:
+    if post.author_id != request.user.pk:
         return redirect('posts:post_detail', post_id)
     form = PostForm(
         request.POST or None, files=request.FILES or None, instance=post
@@ -118,28 +209,34 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(
-        author__following__user=request.user
-    ).select_related('author', 'group')
-    page_obj = function_paginator(request, posts)
-    context = {'page_obj': page_obj}
+    page_obj = function_paginator(request, feed.user_feed(request.user))
+    page_obj.object_list = cards.attach(feed.posts_for(page_obj.object_list))
+    context = {
+        'page_obj': page_obj,
+        'follow_form': FollowManyForm(),
+    }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    follow_check = Follow.objects.filter(
-        user=request.user,
-        author=author.id
-    ).exists()
-    if not follow_check and author.username != request.user.username:
-        Follow.objects.create(user=request.user, author=author)
+    author = get_author_or_404(username)
+    if author.pk != request.user.pk:
+        Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:profile', username=username)
 
 
+@login_required
+@require_POST
+def profile_follow_many(request):
+    form = FollowManyForm(request.POST)
+    if form.is_valid():
+        follows.follow_many(request.user, form.cleaned_data['authors'])
+    return redirect('posts:follow_index')
+
+
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_author_or_404(username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
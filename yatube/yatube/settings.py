@@ -1,5 +1,7 @@
 import os.path
+import tempfile
 from pathlib import Path
+from urllib.parse import urlparse
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -31,11 +33,14 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
 
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -43,23 +48,45 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+
+# Скомпилированные шаблоны держатся в памяти процесса (cached.Loader), и
+# правки шаблонов видны только после перезапуска. По умолчанию включено
+# без DEBUG; переменная TEMPLATE_CACHE=1/0 задаёт режим явно.
+TEMPLATE_CACHE = os.environ.get(
+    'TEMPLATE_CACHE', '0' if DEBUG else '1'
+) == '1'
+template_loaders = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if TEMPLATE_CACHE:
+    template_loaders = [
+        ('django.template.loaders.cached.Loader', template_loaders),
+    ]
+
+context_processors = [
+    'django.template.context_processors.request',
+    'django.contrib.auth.context_processors.auth',
+    'django.contrib.messages.context_processors.messages',
+    'core.context_processors.year.year',
+]
+if DEBUG:
+    context_processors.insert(
+        0, 'django.template.context_processors.debug'
+    )
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.debug',
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-                'core.context_processors.year.year',
-            ],
+            'context_processors': context_processors,
+            'loaders': template_loaders,
         },
     },
 ]
@@ -86,6 +113,31 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения (core.replicas): DATABASE_REPLICA_FILES —
+# пути к копиям SQLite через запятую, их обновляет `manage.py
+# sync_replicas`. Отдельные тестовые базы для реплик не создаются.
+DATABASE_REPLICAS = []
+for number, path in enumerate(filter(None, os.environ.get(
+    'DATABASE_REPLICA_FILES', ''
+).split(','))):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+# Ленты подписок (posts:follow_index) здесь нет: перед чтением она
+# дописывает в основную базу посты популярных авторов, и реплика их
+# ещё не видит.
+DATABASE_REPLICA_VIEWS = [
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+]
+DATABASE_REPLICA_STICKY_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -143,8 +195,89 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 
+# Общий кэш задаётся CACHE_URL:
+#   locmem://                  — кэш в памяти процесса (по умолчанию);
+#   file:///var/tmp/yatube     — файлы, общие для процессов одной машины
+#                                (core.filecache: атомарный add, но не incr);
+#   memcached://host:11211     — memcached (нужен python-memcached),
+#   memcached:///run/mc.sock   — он же через unix-сокет;
+#   redis://host:6379/0        — Redis (нужен пакет django-redis).
+CACHE_URL = os.environ.get('CACHE_URL', 'locmem://')
+
+
+def cache_from_url(url):
+    parsed = urlparse(url)
+    if parsed.scheme == 'file':
+        return {
+            'BACKEND': 'core.filecache.FileCache',
+            'LOCATION': parsed.path,
+        }
+    if parsed.scheme == 'memcached':
+        return {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': parsed.netloc or f'unix:{parsed.path}',
+        }
+    if parsed.scheme == 'redis':
+        return {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': url,
+        }
+    return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+
+
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': cache_from_url(CACHE_URL),
+}
+
+
+# Независимые запросы страницы профиля в пуле потоков
+# (posts.parallel); включается переменной окружения POSTS_PARALLEL_FETCH=1.
+POSTS_PARALLEL_FETCH = os.environ.get('POSTS_PARALLEL_FETCH') == '1'
+POSTS_PARALLEL_WORKERS = 4
+
+
+# Очередь фоновых заданий (core.tasks). По умолчанию задания выполняются
+# сразу; с TASKS_ALWAYS_EAGER=0 их выполняет `manage.py run_tasks`.
+TASKS_ALWAYS_EAGER = os.environ.get('TASKS_ALWAYS_EAGER', '1') == '1'
+
+
+# Profiling and logging
+
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 1.0))
+PROFILING_SLOW_REQUEST_MS = 500
+PROFILING_SLOW_QUERY_MS = 100
+
+METRICS_DIR = os.environ.get(
+    'METRICS_DIR', os.path.join(tempfile.gettempdir(), 'yatube_metrics')
+)
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+LOGS_DIR = os.path.join(BASE_DIR, 'logs')
+os.makedirs(LOGS_DIR, exist_ok=True)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'core.logs.JsonFormatter',
+        },
+    },
+    'handlers': {
+        'profiling_file': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': os.path.join(LOGS_DIR, 'profiling.log'),
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'yatube.profiling': {
+            'handlers': ['profiling_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }